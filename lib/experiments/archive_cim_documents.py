@@ -40,11 +40,37 @@ def _main(source_dir, target_dir):
     if not os.path.isdir(target_dir):
         raise ValueError("Target directory does not exist")
 
+    # Copy new & changed documents.
+    archived = set()
+    copied = 0
     for src in glob.iglob(os.path.join(source_dir, "*.json")):
         dest = hashlib.md5(src.split("/")[-1]).hexdigest()
         dest += ".json"
+        archived.add(dest)
         dest = os.path.join(target_dir, dest)
-        shutil.copyfile(src, dest)
+        if not _is_unchanged(src, dest):
+            shutil.copyfile(src, dest)
+            copied += 1
+
+    # Remove documents no longer extracted.
+    removed = [i for i in os.listdir(target_dir) if i.endswith(".json") and i not in archived]
+    for fname in removed:
+        os.remove(os.path.join(target_dir, fname))
+
+    print "ARCHIVED :: {} copied, {} unchanged, {} removed".format(copied, len(archived) - copied, len(removed))
+
+
+def _is_unchanged(src, dest):
+    """Returns flag indicating whether an archived document matches its source.
+
+    """
+    if not os.path.isfile(dest) or os.path.getsize(src) != os.path.getsize(dest):
+        return False
+
+    with open(src, 'r') as fstream:
+        src_hash = hashlib.md5(fstream.read()).digest()
+    with open(dest, 'r') as fstream:
+        return src_hash == hashlib.md5(fstream.read()).digest()
 
 
 # Entry point.
@@ -9,6 +9,8 @@
 """
 import argparse
 import os
+import resource
+import time
 
 import pyesdoc
 
@@ -42,9 +44,31 @@ _ARGS.add_argument(
     dest="identifiers",
     type=str
     )
+_ARGS.add_argument(
+    "--snapshot-dir",
+    help="Path to a directory in which snapshots of rows read from the worksheet are cached.",
+    dest="snapshot_dir",
+    type=str,
+    default=None
+    )
+_ARGS.add_argument(
+    "--workers",
+    help="Number of worker processes across which documents are encoded.",
+    dest="workers",
+    type=int,
+    default=1
+    )
 _ARGS = _ARGS.parse_args()
 
 
+def _log_timing(phase, started):
+    """Emits time taken by a build phase, together with peak memory usage of the build so far.
+
+    """
+    print "TIMING :: {} :: {:.3f}s :: peak memory = {:.1f}MB".format(
+        phase, time.time() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0)
+
+
 # Validate command line options.
 if not os.path.isfile(_ARGS.spreadsheet_filepath):
     raise ValueError("Spreadsheet file does not exist")
@@ -52,22 +76,30 @@ if not os.path.isdir(_ARGS.io_dir):
     raise ValueError("Archive directory does not exist: {}".format(_ARGS.io_dir))
 
 # Initialise pyesdoc.
+build_started = started = time.time()
 pyesdoc.drq.initialize()
+_log_timing("initialise data request", started)
 
 # Create document identifier mappings.
 identifiers = DocumentIdentifiers(_ARGS.identifiers)
 
 # Open spreadsheet accessor.
-xl = Spreadsheet(_ARGS.spreadsheet_filepath, identifiers)
+started = time.time()
+xl = Spreadsheet(_ARGS.spreadsheet_filepath, identifiers, _ARGS.snapshot_dir)
+_log_timing("open spreadsheet{}".format(" (from snapshot)" if xl.is_from_snapshot else ""), started)
 
-# Create document set.
+# Create document set - worksheets are loaded upon demand.
+started = time.time()
 docs = DocumentSet(xl)
+_log_timing("load spreadsheet & create documents", started)
 
 # Filter out ignoreable documents.
 docs.ignore_documents()
 
 # Set intra-document mesh.
+started = time.time()
 docs.set_document_connections()
+_log_timing("set document connections", started)
 
 # Emit set of unconverted names.
 for collection_type, names in UNCONVERTED_NAMES.items():
@@ -77,10 +109,18 @@ for collection_type, names in UNCONVERTED_NAMES.items():
     print "------------------------------------------------------"
 
 # Create intra-document links.
+started = time.time()
 docs.set_document_links()
+_log_timing("set document links", started)
 
 # Write documents to file system.
-docs.write(_ARGS.io_dir)
+started = time.time()
+written, unchanged, removed = docs.write(_ARGS.io_dir, _ARGS.workers)
+_log_timing("write documents", started)
+print "DOCUMENTS :: {} written, {} unchanged, {} removed".format(written, unchanged, removed)
 
 # Write vocab validation report.
+started = time.time()
 validate_vocabularies(docs[WS_PROJECT], docs[WS_EXPERIMENT])
+_log_timing("validate vocabularies", started)
+_log_timing("total", build_started)
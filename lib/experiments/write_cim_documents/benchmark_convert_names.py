@@ -0,0 +1,132 @@
+"""
+.. module:: benchmark_convert_names.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Benchmarks resolution of CMIP6 experiment spreadsheet cross-references.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import argparse
+import time
+
+import pyesdoc
+
+from constants import WS_SHEETS
+from convertors import UNCONVERTED_NAMES
+from document_identifiers import DocumentIdentifiers
+from document_set import DocumentSet
+from xl import Spreadsheet
+
+
+
+# Define command line options.
+_ARGS = argparse.ArgumentParser("Benchmarks resolution of CMIP6 experiment spreadsheet cross-references.")
+_ARGS.add_argument(
+    "--spreadsheet",
+    help="Path to the CMIP6 experiments worksheet.",
+    dest="spreadsheet_filepath",
+    type=str
+    )
+_ARGS.add_argument(
+    "--identifiers",
+    help="Path to set of CMIP6 experiments document identifiers.",
+    dest="identifiers",
+    type=str
+    )
+
+# Document attributes assigned when setting inter document connections.
+_CONNECTIONS = (
+    "additional_requirements",
+    "citations",
+    "ensemble_axis",
+    "ensembles",
+    "forcing_constraints",
+    "governed_experiments",
+    "governing_mips",
+    "is_constrained_by",
+    "is_constrainer_of",
+    "is_control_for",
+    "is_initialized_by",
+    "is_initializer_of",
+    "is_perturbation_from",
+    "is_sibling_of",
+    "model_configurations",
+    "multi_ensembles",
+    "parties",
+    "related_mips",
+    "required_experiments",
+    "sub_projects",
+    "temporal_constraints",
+    "url",
+)
+
+
+class _LinearDocumentSet(DocumentSet):
+    """Document set whose cross-references are resolved by linear scan, i.e. as prior to name indexes.
+
+    """
+    def _get_index(self, *ws_names):
+        """Returns (unindexed) document collection.
+
+        """
+        return [i for ws_name in ws_names for i in self[ws_name]]
+
+
+def _main(args):
+    """Main entry point.
+
+    """
+    pyesdoc.drq.initialize()
+    xl = Spreadsheet(args.spreadsheet_filepath, DocumentIdentifiers(args.identifiers))
+
+    timings = []
+    outputs = []
+    for doc_set_type in (_LinearDocumentSet, DocumentSet):
+        docs = doc_set_type(xl)
+        docs.ignore_documents()
+        UNCONVERTED_NAMES.clear()
+
+        started = time.time()
+        docs.set_document_connections()
+        timings.append(time.time() - started)
+
+        outputs.append((_get_connections(docs), dict(UNCONVERTED_NAMES)))
+
+    # Report.
+    print "documents = {}".format(len(docs.documents))
+    print "linear scan :: {:.3f}s".format(timings[0])
+    print "name indexes :: {:.3f}s".format(timings[1])
+    if timings[1]:
+        print "speedup = {:.1f}x".format(timings[0] / timings[1])
+    if outputs[0] != outputs[1]:
+        print "WARNING :: output mismatch"
+
+
+def _get_connections(docs):
+    """Returns inter document connections expressed as worksheet positions.
+
+    """
+    positions = dict()
+    for ws_name in WS_SHEETS:
+        for idx, doc in enumerate(docs[ws_name]):
+            positions[id(doc)] = (ws_name, idx)
+    for idx, rp in enumerate(docs.responsible_parties):
+        positions[id(rp)] = ('responsibility', idx)
+
+    def _encode(value):
+        if isinstance(value, list):
+            return sorted(_encode(i) for i in value)
+        if value is None or isinstance(value, basestring):
+            return value
+        return positions.get(id(value), type(value).__name__)
+
+    return sorted((positions[id(doc)], attr, _encode(getattr(doc, attr)))
+                  for doc in docs.documents + docs.responsible_parties
+                  for attr in _CONNECTIONS
+                  if hasattr(doc, attr))
+
+
+# Main entry point.
+if __name__ == '__main__':
+    _main(_ARGS.parse_args())
@@ -135,12 +135,63 @@ def convert_to_cim_v2_responsibilty(role, row, col_idx):
     return responsibility
 
 
+class NameIndex(object):
+    """Index of a document collection by lower-cased name, built per slot upon first use.
+
+    """
+    def __init__(self, collection):
+        """Instance constructor.
+
+        """
+        self.collection = collection
+        self._slots = dict()
+
+
+    def __len__(self):
+        """Returns number of indexed documents.
+
+        """
+        return len(self.collection)
+
+
+    def get(self, name, slots):
+        """Returns document matching a lower-cased name.
+
+        As per a linear scan, the first matching document within the collection is returned.
+
+        """
+        matches = [i for i in (self._get_slot(attr).get(name) for attr in slots) if i]
+        if matches:
+            return min(matches, key=lambda i: i[0])[1]
+
+
+    def _get_slot(self, attr):
+        """Returns map of lower-cased slot values to (position, document) pairs.
+
+        """
+        try:
+            return self._slots[attr]
+        except KeyError:
+            pass
+
+        index = self._slots[attr] = dict()
+        for idx, item in enumerate(self.collection):
+            try:
+                item_name = getattr(item, attr)
+            except AttributeError:
+                continue
+            else:
+                index.setdefault(unicode(item_name).lower(), (idx, item))
+
+        return index
+
+
 def convert_name(
     name,
     collection,
     slots=["citation_detail", "canonical_name", "name"]
     ):
-    """Converts a document name.
+    """Converts a document name - collection is either a list of documents or a NameIndex.
 
     """
     if not collection or name is None:
@@ -158,6 +209,9 @@ def convert_name(
             return
 
     name = name.lower()
+    if isinstance(collection, NameIndex):
+        return collection.get(name, slots)
+
     for item in collection:
         for attr in slots:
             try:
@@ -7,16 +7,46 @@
 .. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
 
 """
-from operator import add
 import collections
+import hashlib
+import itertools
+import os
 
 import pyesdoc.ontologies.cim as cim
 
 from constants import *
 from convertors import *
+from lib.utils.workers import yield_results
 
 
 
+# Worksheets of numerical requirements.
+_NUMERICAL_REQUIREMENT_SHEETS = (
+    WS_REQUIREMENT,
+    WS_FORCING_CONSTRAINT,
+    WS_TEMPORAL_CONSTRAINT,
+    WS_ENSEMBLE_REQUIREMENT,
+    WS_MULTI_ENSEMBLE,
+    WS_START_DATE_ENSEMBLE
+)
+
+# Documents being written, together with target directory - inherited by forked workers.
+_WRITE_STATE = dict()
+
+
+def _memoized(func):
+    """Decorator declaring a derived collection property, memoized until a collection is reassigned.
+
+    """
+    def _get(self):
+        try:
+            return self._derived[func.__name__]
+        except KeyError:
+            return self._derived.setdefault(func.__name__, func(self))
+
+    return property(_get, doc=func.__doc__)
+
+
 class DocumentSet(object):
     """The set of documents extracted from the workwheet.
 
@@ -26,6 +56,8 @@ class DocumentSet(object):
 
         """
         self.docs = collections.defaultdict(list)
+        self._derived = dict()
+        self._indexes = dict()
         for sheet in WS_SHEETS:
             self[sheet] = spreadsheet[sheet]
         self._set_derived_info()
@@ -44,9 +76,11 @@ class DocumentSet(object):
 
         """
         self.docs[ws_name] = collection
+        self._derived.clear()
+        self._indexes.clear()
 
 
-    @property
+    @_memoized
     def documents(self):
         """Gets full set of managed documents.
 
@@ -58,20 +92,15 @@ class DocumentSet(object):
                self[WS_PARTY]
 
 
-    @property
+    @_memoized
     def numerical_requirements(self):
         """Gets full set of managed numerical requirements.
 
         """
-        return self[WS_REQUIREMENT] + \
-               self[WS_FORCING_CONSTRAINT] + \
-               self[WS_TEMPORAL_CONSTRAINT] + \
-               self[WS_ENSEMBLE_REQUIREMENT] + \
-               self[WS_MULTI_ENSEMBLE] + \
-               self[WS_START_DATE_ENSEMBLE]
+        return [i for ws_name in _NUMERICAL_REQUIREMENT_SHEETS for i in self[ws_name]]
 
 
-    @property
+    @_memoized
     def citation_containers(self):
         """Gets full set of managed objects that have citation collections.
 
@@ -81,7 +110,7 @@ class DocumentSet(object):
                self[WS_PROJECT]
 
 
-    @property
+    @_memoized
     def url_containers(self):
         """Gets full set of managed objects that have url collections.
 
@@ -89,7 +118,7 @@ class DocumentSet(object):
         return self[WS_PARTY] + self[WS_CITATIONS]
 
 
-    @property
+    @_memoized
     def responsible_party_containers(self):
         """Gets full set of managed objects that have responsible partie collections.
 
@@ -104,7 +133,17 @@ class DocumentSet(object):
         """Gets full set of managed responsible parties.
 
         """
-        return reduce(add, [i.responsible_parties for i in self.responsible_party_containers])
+        return list(itertools.chain.from_iterable(i.responsible_parties for i in self.responsible_party_containers))
+
+
+    def _get_index(self, *ws_names):
+        """Returns name index of a (set of) document collection(s) - rebuilt after a collection is reassigned.
+
+        """
+        if ws_names not in self._indexes:
+            self._indexes[ws_names] = NameIndex([i for ws_name in ws_names for i in self[ws_name]])
+
+        return self._indexes[ws_names]
 
 
     def _get_doc_link(self, doc, type_note=None):
@@ -177,14 +216,14 @@ class DocumentSet(object):
         """
         # Set urls.
         for x in self.url_containers:
-            x.url = convert_name(x.url, self[WS_URL])
+            x.url = convert_name(x.url, self._get_index(WS_URL))
 
         # Set data links.
         for x in [i for i in self[WS_FORCING_CONSTRAINT] if i.data_link]:
             if x.data_link == 'TBD':
                 x.data_link = None
                 continue
-            url = convert_name(x.data_link, self[WS_URL])
+            url = convert_name(x.data_link, self._get_index(WS_URL))
             if url is None:
                 print 'INVALID FORCING CONSTRAINT DATA LINK:', x.data_link
             else:
@@ -195,16 +234,16 @@ class DocumentSet(object):
 
         # Set citations.
         for x in self.citation_containers:
-            x.citations = convert_names("citations", x.citations, self[WS_CITATIONS])
+            x.citations = convert_names("citations", x.citations, self._get_index(WS_CITATIONS))
 
         # Set responsibility parties.
         for rp in self.responsible_parties:
-            rp.parties = convert_names(WS_PARTY, rp.parties, self[WS_PARTY])
+            rp.parties = convert_names(WS_PARTY, rp.parties, self._get_index(WS_PARTY))
 
         # Set intra-experiment relationships.
         for e in self[WS_EXPERIMENT]:
             for r in {"is_constrained_by", "is_perturbation_from", "is_initialized_by", "is_sibling_of"}:
-                setattr(e, r, convert_names("exp-to-exp", getattr(e, r), self[WS_EXPERIMENT]))
+                setattr(e, r, convert_names("exp-to-exp", getattr(e, r), self._get_index(WS_EXPERIMENT)))
         for e in self[WS_EXPERIMENT]:
             for r in {"is_constrainer_of", "is_control_for", "is_initializer_of"}:
                 setattr(e, r, [])
@@ -222,16 +261,16 @@ class DocumentSet(object):
         # Set experiment requirements.
         for e in self[WS_EXPERIMENT]:
             e.temporal_constraints = \
-                convert_names(WS_TEMPORAL_CONSTRAINT, e.temporal_constraints, self[WS_TEMPORAL_CONSTRAINT])
-            e.forcing_constraints = [convert_name(i, self[WS_FORCING_CONSTRAINT]) or
-                                     convert_name(i, self[WS_REQUIREMENT])
+                convert_names(WS_TEMPORAL_CONSTRAINT, e.temporal_constraints, self._get_index(WS_TEMPORAL_CONSTRAINT))
+            e.forcing_constraints = [convert_name(i, self._get_index(WS_FORCING_CONSTRAINT)) or
+                                     convert_name(i, self._get_index(WS_REQUIREMENT))
                                      for i in e.forcing_constraints]
             e.ensembles = \
-                convert_names(WS_ENSEMBLE_REQUIREMENT, e.ensembles, self[WS_ENSEMBLE_REQUIREMENT])
+                convert_names(WS_ENSEMBLE_REQUIREMENT, e.ensembles, self._get_index(WS_ENSEMBLE_REQUIREMENT))
             e.model_configurations = \
-                convert_names(WS_REQUIREMENT, e.model_configurations, self[WS_REQUIREMENT])
+                convert_names(WS_REQUIREMENT, e.model_configurations, self._get_index(WS_REQUIREMENT))
             e.multi_ensembles = \
-                convert_names(WS_MULTI_ENSEMBLE, e.multi_ensembles, self[WS_MULTI_ENSEMBLE])
+                convert_names(WS_MULTI_ENSEMBLE, e.multi_ensembles, self._get_index(WS_MULTI_ENSEMBLE))
 
         # Set project sub-projects.
         for p in self[WS_PROJECT]:
@@ -239,7 +278,7 @@ class DocumentSet(object):
 
         # Set experiment governing mip.
         for e in self[WS_EXPERIMENT]:
-            e.governing_mips = convert_names("exp-to-project", e.governing_mips, self[WS_PROJECT], slots=["name"], collection_name=e.name)
+            e.governing_mips = convert_names("exp-to-project", e.governing_mips, self._get_index(WS_PROJECT), slots=["name"], collection_name=e.name)
             for p in e.governing_mips:
                 p.governed_experiments.append(e)
 
@@ -254,20 +293,20 @@ class DocumentSet(object):
         # Set additional experimental requirements.
         for rq in self[WS_REQUIREMENT]:
             rq.additional_requirements = \
-                convert_names("additional requirements", rq.additional_requirements, self.numerical_requirements)
+                convert_names("additional requirements", rq.additional_requirements, self._get_index(*_NUMERICAL_REQUIREMENT_SHEETS))
 
         # Set multi-ensemble axis.
         for me in self[WS_MULTI_ENSEMBLE]:
-            me.ensemble_axis = convert_names("multi-ensemble", me.ensemble_axis, self.numerical_requirements)
+            me.ensemble_axis = convert_names("multi-ensemble", me.ensemble_axis, self._get_index(*_NUMERICAL_REQUIREMENT_SHEETS))
 
         # Set sub-projects.
         for p in self[WS_PROJECT]:
             p.meta.sub_projects = sorted(p.sub_projects)
-            p.sub_projects = convert_names("sub-projects", p.sub_projects, self[WS_PROJECT])
+            p.sub_projects = convert_names("sub-projects", p.sub_projects, self._get_index(WS_PROJECT))
 
         # Set project required experiments.
         for p in self[WS_PROJECT]:
-            p.required_experiments = convert_names("prj-to-exp", p.required_experiments, self[WS_EXPERIMENT], collection_name=p.name)
+            p.required_experiments = convert_names("prj-to-exp", p.required_experiments, self._get_index(WS_EXPERIMENT), collection_name=p.name)
 
         # Set governed experiments - order as per required experiments.
         for p in self[WS_PROJECT]:
@@ -339,16 +378,16 @@ class DocumentSet(object):
             set_links(p, "governed_experiments", "tier")
 
 
-    def write(self, io_dir):
-        """Writes documents to file system.
+    def write(self, io_dir, workers=1):
+        """Writes documents to file system - rewriting only those whose encoding has changed.
 
-        """
-        def _write(doc, encoding):
-            """Writes document to file system.
+        Documents are encoded across a pool of workers, files of documents no longer
+        within the set are removed.
 
-            """
-            pyesdoc.write(doc, io_dir, encoding=encoding)
+        :returns: Number of written, unchanged & removed documents.
+        :rtype: tuple
 
+        """
         # Remove helper attributes that do not need to be serialized.
         for experiment in self[WS_EXPERIMENT]:
             del experiment.temporal_constraints
@@ -357,5 +396,49 @@ class DocumentSet(object):
             del experiment.model_configurations
             del experiment.multi_ensembles
 
-        for doc in self.documents:
-            _write(doc, pyesdoc.constants.ENCODING_JSON)
+        # Workers are passed document positions as documents are inherited upon fork.
+        _WRITE_STATE['documents'] = self.documents
+        _WRITE_STATE['io_dir'] = io_dir
+        try:
+            results = list(yield_results(_write_document, range(len(self.documents)), workers))
+        finally:
+            _WRITE_STATE.clear()
+
+        # Remove files of documents no longer within the set.
+        fnames = set(fname for fname, _ in results)
+        removed = [i for i in os.listdir(io_dir)
+                   if i.endswith('.{}'.format(pyesdoc.constants.ENCODING_JSON)) and i not in fnames]
+        for fname in removed:
+            os.remove(os.path.join(io_dir, fname))
+
+        written = len([i for _, i in results if i])
+
+        return written, len(results) - written, len(removed)
+
+
+def _write_document(idx):
+    """Writes a document to file system unless its encoding matches that of the existing file.
+
+    :returns: (file name, written flag) pair.
+    :rtype: tuple
+
+    """
+    doc = _WRITE_STATE['documents'][idx]
+    fname = pyesdoc.get_filename(doc, pyesdoc.constants.ENCODING_JSON)
+    fpath = os.path.join(_WRITE_STATE['io_dir'], fname)
+
+    content = pyesdoc.encode(doc, pyesdoc.constants.ENCODING_JSON)
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+
+    try:
+        with open(fpath, 'r') as fstream:
+            is_changed = hashlib.sha1(fstream.read()).digest() != hashlib.sha1(content).digest()
+    except IOError:
+        is_changed = True
+
+    if is_changed:
+        with open(fpath, 'w') as fstream:
+            fstream.write(content)
+
+    return fname, is_changed
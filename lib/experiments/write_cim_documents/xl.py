@@ -7,10 +7,10 @@
 .. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
 
 """
-import xlrd
-
 import pyesdoc
 
+import xl_reader
+import xl_snapshot
 from constants import *
 from convertors import *
 from xl_mappings import WS_MAPS
@@ -21,35 +21,50 @@ class Spreadsheet(object):
     """The spreadsheet from which CIM documents are to be extracted.
 
     """
-    def __init__(self, worksheet_fpath, identifiers):
+    def __init__(self, worksheet_fpath, identifiers, snapshot_dir=None):
         """Instance constructor.
 
         """
         self.ids = identifiers
-        self._spreadsheet = xlrd.open_workbook(worksheet_fpath)
-
+        self.is_from_snapshot = False
+        self._rows = None
+        self._spreadsheet = None
 
-    def _get_sheet(self, ws_name):
-        """Returns pointer to a named worksheet.
+        # Rows are either loaded from a snapshot of an unchanged workbook or are read on demand.
+        if snapshot_dir is not None:
+            layout = [(i, WS_ROW_OFFSETS[i], _get_column_count(i)) for i in WS_SHEETS]
+            key = xl_snapshot.get_key(worksheet_fpath, layout)
+            self._rows = xl_snapshot.load(snapshot_dir, key)
+            self.is_from_snapshot = self._rows is not None
 
-        """
-        return self._spreadsheet.sheet_by_name(ws_name)
+        if self._rows is None:
+            self._spreadsheet = xl_reader.open_workbook(worksheet_fpath)
+            if snapshot_dir is not None:
+                self._rows = dict((i, list(self._yield_rows(i))) for i in WS_SHEETS)
+                xl_snapshot.save(snapshot_dir, key, self._rows)
 
 
     def _get_rows(self, ws_name):
-        """Returns collection of rows within a named worksheet.
+        """Returns collection of rows within a named worksheet, each row being a list of cell values.
+
+        Only columns up to the last mapped column are read - convertors may read any of them.
 
         """
-        return enumerate(self._get_sheet(ws_name).get_rows())
+        return self._spreadsheet.yield_rows(ws_name, _get_column_count(ws_name))
 
 
     def _yield_rows(self, ws_name):
         """Yields rows within a named worksheet.
 
         """
+        if self._rows is not None:
+            for idx, row in self._rows[ws_name]:
+                yield idx, row
+            return
+
         for idx, row in self._get_rows(ws_name):
             if idx >= WS_ROW_OFFSETS[ws_name] and \
-               len(row[0].value):
+               len(row[0]):
                 yield idx, row
 
 
@@ -58,7 +73,7 @@ class Spreadsheet(object):
 
         """
         # Extract raw cell value.
-        value = row[col_idx - 1].value
+        value = row[col_idx - 1]
 
         # Nullify dead text.
         if isinstance(value, (unicode, str)):
@@ -73,7 +88,7 @@ class Spreadsheet(object):
             try:
                 return convertor(value)
             except TypeError:
-                return convertor(value, lambda i: row[i - 1].value)
+                return convertor(value, lambda i: row[i - 1])
 
         return value
 
@@ -145,4 +160,13 @@ class Spreadsheet(object):
         for mapping in mappings:
             self._set_document_attribute(doc, row, mapping)
 
-        return doc
\ No newline at end of file
+        return doc
+
+
+def _get_column_count(ws_name):
+    """Returns number of leading worksheet columns read by the mappings of a worksheet.
+
+    """
+    _, mappings = WS_MAPS[ws_name]
+
+    return max(convert_col_idx(mapping[1].split("-")[-1]) for mapping in mappings)
@@ -0,0 +1,185 @@
+"""
+.. module:: xl_reader.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: On demand, column selective reader of the CMIP6 experiments workbook.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import re
+import zipfile
+
+try:
+    from xml.etree import cElementTree as ET
+except ImportError:
+    from xml.etree import ElementTree as ET
+
+import xlrd
+from xlrd.biffh import error_text_from_code
+
+from lib.utils import xlsx
+
+
+
+# Whitespace stripped from text that is not space preserved.
+_XML_WHITESPACE = '\t\n \r'
+
+# Escaped characters within text, e.g. _x000D_.
+_XML_ESCAPE = re.compile(r'_x[0-9A-Fa-f]{4,4}_', re.UNICODE)
+
+# Cell error codes keyed by error text.
+_ERROR_CODES = dict((v, k) for k, v in error_text_from_code.items())
+
+# Cell boolean codes keyed by xsd:boolean text.
+_BOOLEAN_CODES = {
+    None: 0,
+    '': 0,
+    '0': 0,
+    '1': 1,
+    'false': 0,
+    'off': 0,
+    'on': 1,
+    'true': 1,
+}
+
+
+def open_workbook(fpath):
+    """Returns a workbook whose worksheets are read upon demand.
+
+    Cell values are as per xlrd, i.e. text is unicode, numbers are floats, booleans & errors are integers
+    and empty cells are empty strings.
+
+    :param str fpath: Path to an xlsx (or legacy xls) workbook.
+
+    """
+    if zipfile.is_zipfile(fpath):
+        return _XlsxWorkbook(fpath)
+
+    return _XlsWorkbook(fpath)
+
+
+class _XlsxWorkbook(object):
+    """An xlsx workbook whose worksheets are streamed upon demand.
+
+    """
+    def __init__(self, fpath):
+        """Instance constructor.
+
+        """
+        self._workbook = xlsx.Workbook(fpath)
+        self._sheets = dict(self._workbook.sheets)
+        self._shared_strings = None
+
+
+    def yield_rows(self, ws_name, col_count):
+        """Yields (row index, values) pairs of the leading columns of a named worksheet.
+
+        Rows are parsed one at a time, cells beyond the leading columns are not decoded.
+
+        :param str ws_name: Worksheet name.
+        :param int col_count: Number of leading columns to be read.
+
+        """
+        try:
+            ws_path = self._sheets[ws_name]
+        except KeyError:
+            raise xlrd.XLRDError('No sheet named <%r>' % ws_name)
+
+        if self._shared_strings is None:
+            self._shared_strings = self._workbook.get_shared_strings(_get_text)
+
+        rowx = -1
+        with self._workbook.open(ws_path) as fstream:
+            for _, element in ET.iterparse(fstream):
+                if element.tag != xlsx.TAG_ROW:
+                    continue
+                rowx = int(element.get('r')) - 1 if element.get('r') else rowx + 1
+                values = [u''] * col_count
+                colx = -1
+                for cell in element.iter(xlsx.TAG_CELL):
+                    colx = xlsx.get_column(cell.get('r')) if cell.get('r') else colx + 1
+                    if colx < col_count:
+                        values[colx] = _get_value(cell, self._shared_strings)
+                element.clear()
+                yield rowx, values
+
+
+class _XlsWorkbook(object):
+    """A legacy xls workbook whose worksheets are loaded by xlrd upon demand.
+
+    """
+    def __init__(self, fpath):
+        """Instance constructor.
+
+        """
+        self._book = xlrd.open_workbook(fpath, on_demand=True)
+
+
+    def yield_rows(self, ws_name, col_count):
+        """Yields (row index, values) pairs of the leading columns of a named worksheet.
+
+        :param str ws_name: Worksheet name.
+        :param int col_count: Number of leading columns to be read.
+
+        """
+        sheet = self._book.sheet_by_name(ws_name)
+        try:
+            for rowx in range(sheet.nrows):
+                values = sheet.row_values(rowx, 0, col_count)
+                yield rowx, values + [u''] * (col_count - len(values))
+        finally:
+            self._book.unload_sheet(ws_name)
+
+
+def _get_value(cell, shared_strings):
+    """Returns value of a worksheet cell - as decoded by xlrd.
+
+    """
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'n':
+        value = cell.findtext(xlsx.TAG_VALUE)
+        return float(value) if value else u''
+
+    elif cell_type == 's':
+        value = cell.findtext(xlsx.TAG_VALUE)
+        return shared_strings[int(value)] if value else u''
+
+    elif cell_type == 'str':
+        value = cell.find(xlsx.TAG_VALUE)
+        return None if value is None else _get_cooked_text(value)
+
+    elif cell_type == 'b':
+        return _BOOLEAN_CODES[cell.findtext(xlsx.TAG_VALUE)]
+
+    elif cell_type == 'e':
+        return _ERROR_CODES[cell.findtext(xlsx.TAG_VALUE, '#N/A')]
+
+    elif cell_type == 'inlineStr':
+        value = cell.find(xlsx.TAG_INLINE_STRING)
+        value = cell.findtext(xlsx.TAG_VALUE) if value is None else _get_text(value)
+        return value or u''
+
+    raise xlrd.XLRDError('Unknown cell type %r in cell %r' % (cell_type, cell.get('r')))
+
+
+def _get_text(element):
+    """Returns text content of a (possibly rich) string element - as decoded by xlrd.
+
+    """
+    return xlsx.get_text(element, _get_cooked_text)
+
+
+def _get_cooked_text(element):
+    """Returns unescaped text of an element, stripped of whitespace unless space preserved.
+
+    """
+    text = element.text
+    if text is None:
+        return u''
+    if element.get(xlsx.ATTR_SPACE) != 'preserve':
+        text = text.strip(_XML_WHITESPACE)
+    if '_' in text:
+        text = _XML_ESCAPE.sub(lambda i: unichr(int(i.group(0)[2:6], 16)), text)
+
+    return unicode(text)
@@ -0,0 +1,84 @@
+"""
+.. module:: xl_snapshot.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Snapshots of rows extracted from the CMIP6 experiments workbook.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import hashlib
+import marshal
+import os
+import zlib
+
+
+
+# Version of snapshot format (incl. reader semantics) - bump when either changes.
+_VERSION = 1
+
+# Snapshot file extension.
+_EXTENSION = '.snapshot'
+
+
+def get_key(worksheet_fpath, layout):
+    """Returns key of a snapshot.
+
+    :param str worksheet_fpath: Path to experiments workbook.
+    :param object layout: Row extraction layout, i.e. worksheets, row offsets & column counts.
+
+    :returns: Workbook hash combined with layout hash.
+    :rtype: str
+
+    """
+    with open(worksheet_fpath, 'rb') as fstream:
+        workbook_hash = hashlib.sha1(fstream.read()).hexdigest()
+    layout_hash = hashlib.sha1(repr((_VERSION, marshal.version, layout))).hexdigest()
+
+    return '{}_{}'.format(workbook_hash, layout_hash[:12])
+
+
+def load(folder, key):
+    """Returns rows of a snapshot, or None if not found.
+
+    :param str folder: Folder in which snapshots are stored.
+    :param str key: Snapshot key.
+
+    :returns: Worksheet rows, i.e. (row index, values) pairs, keyed by worksheet name.
+    :rtype: dict
+
+    """
+    try:
+        with open(_get_fpath(folder, key), 'rb') as fstream:
+            return marshal.loads(zlib.decompress(fstream.read()))
+    except (IOError, ValueError, EOFError, TypeError, zlib.error):
+        return None
+
+
+def save(folder, key, rows):
+    """Saves rows to a snapshot, removing snapshots of other workbook versions.
+
+    :param str folder: Folder in which snapshots are stored.
+    :param str key: Snapshot key.
+    :param dict rows: Worksheet rows, i.e. (row index, values) pairs, keyed by worksheet name.
+
+    """
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    for fname in os.listdir(folder):
+        if fname.endswith(_EXTENSION):
+            os.remove(os.path.join(folder, fname))
+
+    # Written atomically so that an interrupted run leaves no partial snapshot.
+    fpath = _get_fpath(folder, key)
+    fpath_tmp = '{}.{}'.format(fpath, os.getpid())
+    with open(fpath_tmp, 'wb') as fstream:
+        fstream.write(zlib.compress(marshal.dumps(rows), 1))
+    os.rename(fpath_tmp, fpath)
+
+
+def _get_fpath(folder, key):
+    """Returns path to a snapshot file.
+
+    """
+    return os.path.join(folder, '{}{}'.format(key, _EXTENSION))
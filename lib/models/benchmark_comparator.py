@@ -0,0 +1,85 @@
+"""
+.. module:: benchmark_comparator.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Benchmarks model comparator node & edge table builders.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import argparse
+import time
+
+from lib.models import generate_comparator_json
+from lib.utils import logger
+
+
+
+# Define command line argument parser.
+_ARGS = argparse.ArgumentParser("Benchmarks CMIP6 model comparator builders.")
+
+
+def _main(args):
+    """Main entry point.
+
+    """
+    # Load full archive once so that only table building is timed.
+    started = time.time()
+    documentation = list(generate_comparator_json._yield_documentation())
+    logger.log('documents = {} :: loaded in {:.3f}s'.format(len(documentation), time.time() - started), app='SH')
+
+    outputs = []
+    timings = []
+    for builder in (_build_with_lists, generate_comparator_json.build):
+        started = time.time()
+        outputs.append(builder(documentation))
+        timings.append(time.time() - started)
+
+    # Report.
+    logger.log('edges = {}'.format(len(outputs[-1][1])), app='SH')
+    logger.log('lists :: {:.3f}s'.format(timings[0]), app='SH')
+    logger.log('interning tables :: {:.3f}s'.format(timings[1]), app='SH')
+    if timings[1]:
+        logger.log('speedup = {:.1f}x'.format(timings[0] / timings[1]), app='SH')
+    if outputs[0] != outputs[1]:
+        logger.log_warning('output mismatch')
+
+
+def _build_with_lists(documentation):
+    """Returns comparator nodes & edges - as built prior to interning tables.
+
+    """
+    institutes = []
+    models = []
+    topics = []
+    specializations = []
+    values = []
+    edges = []
+
+    for i, m, t, content in documentation:
+        for sp in list(content):
+            for v in content[sp]['values']:
+                if i not in institutes:
+                    institutes.append(i)
+                if m not in models:
+                    models.append(m)
+                if t not in topics:
+                    topics.append(t)
+                if sp not in specializations:
+                    specializations.append(sp)
+                if v not in values:
+                    values.append(v)
+                edges.append((
+                    institutes.index(i),
+                    models.index(m),
+                    topics.index(t),
+                    specializations.index(sp),
+                    values.index(v),
+                ))
+
+    return [institutes, models, topics, specializations, values], edges
+
+
+# Main entry point.
+if __name__ == '__main__':
+    _main(_ARGS.parse_args())
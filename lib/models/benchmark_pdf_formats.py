@@ -0,0 +1,72 @@
+"""
+.. module:: benchmark_pdf_formats.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Benchmarks model PDF compilation with & without a precompiled preamble format.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from lib.models import generate_pdf
+from lib.utils import logger
+from lib.utils import vocabs
+
+
+
+# Define command line argument parser.
+_ARGS = argparse.ArgumentParser("Benchmarks CMIP6 model PDF compilation with & without a precompiled preamble.")
+_ARGS.add_argument(
+    "--institution-id",
+    help="An institution identifier",
+    dest="institution_id",
+    type=str,
+    default="ipsl"
+    )
+_ARGS.add_argument(
+    "--timeout",
+    help="Number of seconds after which compilation of a topic is abandoned",
+    dest="timeout",
+    type=int,
+    default=600
+    )
+
+
+def _main(args):
+    """Main entry point.
+
+    """
+    started = time.time()
+    fmt = generate_pdf.get_format(args.timeout)
+    logger.log('format :: {:.3f}s'.format(time.time() - started), app='SH')
+
+    modes = (('preamble', None), ('format', fmt))
+    totals = dict((i, 0.0) for i, _ in modes)
+    count = 0
+    for i, s, t in vocabs.yield_topics(args.institution_id):
+        for mode, mode_fmt in modes:
+            # Each compilation starts from an empty scratch folder, archived PDFs are left untouched.
+            folder = tempfile.mkdtemp(prefix='cmip6-pdf-')
+            try:
+                started = time.time()
+                generate_pdf.compile_pdf(i, s, t, folder, args.timeout, mode_fmt)
+                totals[mode] += time.time() - started
+            finally:
+                shutil.rmtree(folder, ignore_errors=True)
+        count += 1
+
+    # Report.
+    logger.log('topics = {}'.format(count), app='SH')
+    for mode, _ in modes:
+        logger.log('{} :: {:.3f}s per topic'.format(mode, totals[mode] / max(count, 1)), app='SH')
+    if totals[modes[-1][0]]:
+        logger.log('speedup = {:.1f}x'.format(totals[modes[0][0]] / totals[modes[-1][0]]), app='SH')
+
+
+# Main entry point.
+if __name__ == '__main__':
+    _main(_ARGS.parse_args())
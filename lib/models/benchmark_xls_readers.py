@@ -0,0 +1,70 @@
+"""
+.. module:: benchmark_xls_readers.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Benchmarks model topic spreadsheet readers used when generating JSON.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import argparse
+import json
+import time
+
+from lib.models import generate_json
+from lib.utils import logger
+from lib.utils import vocabs
+
+
+
+# Define command line argument parser.
+_ARGS = argparse.ArgumentParser("Benchmarks CMIP6 model topic spreadsheet readers.")
+_ARGS.add_argument(
+    "--institution-id",
+    help="An institution identifier",
+    dest="institution_id",
+    type=str
+    )
+
+# Readers to be benchmarked - first is the reference.
+_READERS = ("openpyxl", "stream")
+
+
+def _main(args):
+    """Main entry point.
+
+    """
+    totals = dict((i, 0.0) for i in _READERS)
+    mismatches = []
+    count = 0
+    for i, s, t in vocabs.yield_topics(args.institution_id):
+        try:
+            fpath = generate_json._get_spreadsheet(i, s, t)
+        except IOError:
+            continue
+
+        # Time each reader & serialize output as per io_mgr.write_model_topic_json.
+        outputs = []
+        for reader in _READERS:
+            started = time.time()
+            content = generate_json._get_content(i, s, t, fpath, reader)
+            totals[reader] += time.time() - started
+            outputs.append(json.dumps(content, indent=4))
+
+        count += 1
+        if len(set(outputs)) > 1:
+            mismatches.append(fpath)
+
+    # Report.
+    logger.log('spreadsheets = {}'.format(count), app='SH')
+    for reader in _READERS:
+        logger.log('{} :: {:.3f}s'.format(reader, totals[reader]), app='SH')
+    if totals[_READERS[-1]]:
+        logger.log('speedup = {:.1f}x'.format(totals[_READERS[0]] / totals[_READERS[-1]]), app='SH')
+    for fpath in mismatches:
+        logger.log_warning('output mismatch :: {}'.format(fpath))
+
+
+# Main entry point.
+if __name__ == '__main__':
+    _main(_ARGS.parse_args())
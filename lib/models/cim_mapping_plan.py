@@ -0,0 +1,132 @@
+"""
+.. module:: cim_mapping_plan.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Compiled plans for mapping model topic JSON output to CIM.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import collections
+import json
+import os
+
+from lib.utils import io_mgr
+
+
+
+# Name of cache folder in which compiled plans are stored.
+_CACHE_NAME = 'cim_mapping_plans'
+
+# Container kinds.
+CONTAINER_PROPERTY_SET = 'property-set'
+CONTAINER_TOPIC = 'topic'
+
+# Type keys of topic sections mapped to CIM.
+_SECTION_TYPE_KEYS = ('grid', 'keyprops', 'process')
+
+# In-process plan cache.
+_PLANS = dict()
+
+
+class MappingPlan(object):
+    """A compiled plan for mapping a topic specialization to CIM.
+
+    Lists in specialization order the properties reachable from each topic section
+    together with the path of containers (topics & property-sets) leading to them.
+
+    """
+    def __init__(self, obj):
+        """Instance initialiser.
+
+        """
+        self.containers = obj['containers']
+        self.properties = obj['properties']
+        self.sections = obj['sections']
+        self._index = dict((p[0], idx) for idx, p in enumerate(self.properties))
+
+
+    def yield_properties(self, content):
+        """Yields (property id, container path) pairs for the properties populated within content.
+
+        """
+        for idx in sorted(self._index[i] for i in content if i in self._index):
+            yield self.properties[idx]
+
+
+def get_plan(specialization):
+    """Returns mapping plan for a topic specialization - compiled once per specialization version.
+
+    :param TopicSpecialization specialization: A topic specialization.
+
+    :returns: Mapping plan.
+    :rtype: MappingPlan
+
+    """
+    key = '{}_{}'.format(specialization.id, specialization.change_history[-1][0])
+    if key not in _PLANS:
+        _PLANS[key] = MappingPlan(_load(key) or _save(key, _compile(specialization)))
+
+    return _PLANS[key]
+
+
+def _get_fpath(key):
+    """Returns path to a cached plan.
+
+    """
+    return os.path.join(io_mgr.get_cache_folder(_CACHE_NAME), '{}.json'.format(key))
+
+
+def _load(key):
+    """Returns a plan loaded from cache.
+
+    """
+    try:
+        with open(_get_fpath(key), 'r') as fstream:
+            return json.loads(fstream.read())
+    except (IOError, ValueError):
+        return None
+
+
+def _save(key, obj):
+    """Saves a plan to cache - written atomically as workers may compile concurrently.
+
+    """
+    fpath = _get_fpath(key)
+    fpath_tmp = '{}.{}'.format(fpath, os.getpid())
+    with open(fpath_tmp, 'w') as fstream:
+        fstream.write(json.dumps(obj, indent=4))
+    os.rename(fpath_tmp, fpath)
+
+    return obj
+
+
+def _compile(specialization):
+    """Compiles a mapping plan by walking a topic specialization.
+
+    Walk order mirrors CIM output order: properties, then property-sets, then sub-topics.
+
+    """
+    obj = collections.OrderedDict()
+    obj['sections'] = []
+    obj['containers'] = collections.OrderedDict()
+    obj['properties'] = []
+
+    def _walk_topic(topic, path):
+        path = path + [topic.id]
+        obj['containers'][topic.id] = CONTAINER_TOPIC
+        for p in topic.properties:
+            obj['properties'].append([p.id, path])
+        for ps in topic.property_sets:
+            obj['containers'][ps.id] = CONTAINER_PROPERTY_SET
+            for p in ps.properties:
+                obj['properties'].append([p.id, path + [ps.id]])
+        for st in topic.sub_topics:
+            _walk_topic(st, path)
+
+    for st in specialization.sub_topics:
+        if st.type_key in _SECTION_TYPE_KEYS:
+            obj['sections'].append([st.type_key, st.id])
+            _walk_topic(st, [])
+
+    return obj
@@ -0,0 +1,152 @@
+"""
+.. module:: comparator_shards.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Writes sharded, compressed CMIP6 model comparator data.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import array
+import collections
+import gzip
+import json
+import os
+import sys
+
+
+
+# Shard keys.
+SHARD_BY_INSTITUTE = 'institute'
+SHARD_BY_TOPIC = 'topic'
+
+# Edge columns - in node table order.
+_COLUMNS = ('institute', 'model', 'topic', 'specialization', 'value')
+
+# Position of each shard key within an edge.
+_SHARD_COLUMN = {
+    SHARD_BY_INSTITUTE: 0,
+    SHARD_BY_TOPIC: 2,
+}
+
+# Integer packings ordered by width: (javascript typed array, width in bytes).
+_PACKINGS = (
+    ('Uint8Array', 1),
+    ('Uint16Array', 2),
+    ('Uint32Array', 4),
+)
+
+# Python array typecodes mapped by width - widths are platform dependent.
+_TYPECODES = dict((array.array(i).itemsize, i) for i in 'LIHB')
+
+# Alignment (bytes) of columns within a shard - permits zero copy typed array views.
+_ALIGNMENT = 4
+
+# Version of index format.
+_VERSION = 1
+
+
+def write(folder, nodes, edges, shard_by):
+    """Writes nodes, edge shards & an index of shards, each with a precompressed (.gz) variant.
+
+    Each shard holds the edges of one institute (or topic) as columns of little-endian unsigned integers,
+    each column being packed into the narrowest integer type able to hold it.
+
+    :param str folder: Folder to which files are written.
+    :param list nodes: Compacted nodes, i.e. (node type, node id, node name) tuples.
+    :param list edges: Edges, i.e. (institute, model, topic, specialization, value) node id tuples.
+    :param str shard_by: Shard key: institute | topic.
+
+    """
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    # Remove shards of previous run as shard keys may have changed.
+    for fname in os.listdir(folder):
+        if fname.startswith('edges_'):
+            os.remove(os.path.join(folder, fname))
+
+    # Group edges by shard key, retaining edge order.
+    shards = collections.OrderedDict()
+    for edge in edges:
+        shards.setdefault(edge[_SHARD_COLUMN[shard_by]], []).append(edge)
+
+    # Names of shard key nodes.
+    names = dict((n[1], n[2]) for n in nodes if n[0] == _SHARD_COLUMN[shard_by])
+
+    index = collections.OrderedDict()
+    index['version'] = _VERSION
+    index['shardBy'] = shard_by
+    index['columns'] = _COLUMNS
+    index['nodes'] = 'nodes.json'
+    index['shards'] = []
+    for key, shard_edges in shards.items():
+        fname = 'edges_{}_{}.bin'.format(shard_by, names[key])
+        content, columns = _pack(shard_edges)
+        _write_file(folder, fname, content)
+
+        shard = collections.OrderedDict()
+        shard['key'] = names[key]
+        shard['file'] = fname
+        shard['count'] = len(shard_edges)
+        shard['columns'] = columns
+        shard['topics'] = sorted(set(e[2] for e in shard_edges))
+        shard['specializations'] = sorted(set(e[3] for e in shard_edges))
+        index['shards'].append(shard)
+
+    _write_file(folder, 'nodes.json', json.dumps(nodes))
+    _write_file(folder, 'index.json', json.dumps(index))
+
+
+def _pack(edges):
+    """Returns edges packed as columns of little-endian unsigned integers, plus column layout.
+
+    """
+    content = []
+    layout = []
+    offset = 0
+    for idx, name in enumerate(_COLUMNS):
+        values = [e[idx] for e in edges]
+        js_type, typecode = _get_packing(max(values))
+        column = array.array(typecode, values)
+        if sys.byteorder == 'big':
+            column.byteswap()
+
+        padding = -offset % _ALIGNMENT
+        content.append('\0' * padding)
+        content.append(column.tostring())
+
+        item = collections.OrderedDict()
+        item['name'] = name
+        item['type'] = js_type
+        item['offset'] = offset + padding
+        layout.append(item)
+
+        offset += padding + len(content[-1])
+
+    return ''.join(content), layout
+
+
+def _get_packing(max_value):
+    """Returns narrowest (typed array, typecode) packing able to hold a value.
+
+    """
+    for js_type, width in _PACKINGS:
+        if max_value < 2 ** (8 * width):
+            return js_type, _TYPECODES[width]
+
+    raise ValueError('Node id too large to pack: {}'.format(max_value))
+
+
+def _write_file(folder, fname, content):
+    """Writes a file together with a precompressed (.gz) variant.
+
+    """
+    fpath = os.path.join(folder, fname)
+    with open(fpath, 'wb') as fstream:
+        fstream.write(content)
+
+    # Gzip header timestamp is zeroed so that unchanged content yields unchanged files.
+    with open('{}.gz'.format(fpath), 'wb') as fstream:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=fstream, compresslevel=9, mtime=0) as gz:
+            gz.write(content)
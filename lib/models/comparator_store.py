@@ -0,0 +1,139 @@
+"""
+.. module:: comparator_store.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Persistent store of model topic contributions to comparator edges.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import hashlib
+import json
+import os
+
+from lib.utils import io_mgr
+
+
+
+# Name of cache folder in which store is persisted.
+_CACHE_NAME = 'comparator'
+
+# Name of store file.
+_FNAME = 'contributions.json'
+
+# Version of store format - stores of other versions are discarded.
+_VERSION = 1
+
+
+class ContributionStore(object):
+    """Topic contributions, i.e. (specialization, values) pairs, keyed by topic file path.
+
+    A topic file is re-read only when its modification time or size has changed, and is
+    re-parsed only when its content hash has changed.
+
+    """
+    def __init__(self, fpath=None):
+        """Instance initialiser.
+
+        """
+        self.fpath = fpath or os.path.join(io_mgr.get_cache_folder(_CACHE_NAME), _FNAME)
+        self.hits = 0
+        self.misses = 0
+        self.removed = 0
+        self._items = _load(self.fpath)
+        self._is_dirty = False
+        self._requested = set()
+
+
+    def clear(self):
+        """Discards persisted contributions so that all topic files are re-read.
+
+        """
+        self._items.clear()
+        self._is_dirty = True
+
+
+    def get(self, fpath):
+        """Returns contributions of a topic file.
+
+        :param str fpath: Path to topic JSON file.
+
+        :returns: Set of (specialization, values) pairs in topic file order.
+        :rtype: list
+
+        """
+        self._requested.add(fpath)
+        try:
+            stat = os.stat(fpath)
+        except OSError:
+            return []
+
+        item = self._items.get(fpath)
+        if item is not None and item['mtime'] == stat.st_mtime and item['size'] == stat.st_size:
+            self.hits += 1
+            return item['contributions']
+
+        with open(fpath, 'r') as fstream:
+            raw = fstream.read()
+        digest = hashlib.sha1(raw).hexdigest()
+
+        # Touched but unchanged files are not re-parsed.
+        if item is not None and item['hash'] == digest:
+            self.hits += 1
+        else:
+            self.misses += 1
+            item = {
+                'contributions': _get_contributions(json.loads(raw)),
+                'hash': digest
+            }
+        item['mtime'] = stat.st_mtime
+        item['size'] = stat.st_size
+        self._items[fpath] = item
+        self._is_dirty = True
+
+        return item['contributions']
+
+
+    def save(self):
+        """Persists store, dropping topic files not requested since initialisation.
+
+        """
+        for fpath in set(self._items) - self._requested:
+            del self._items[fpath]
+            self.removed += 1
+            self._is_dirty = True
+
+        if not self._is_dirty:
+            return
+
+        # Written atomically so that an interrupted run leaves the previous store intact.
+        fpath_tmp = '{}.{}'.format(self.fpath, os.getpid())
+        with open(fpath_tmp, 'w') as fstream:
+            fstream.write(json.dumps({
+                'version': _VERSION,
+                'topics': self._items
+            }))
+        os.rename(fpath_tmp, self.fpath)
+        self._is_dirty = False
+
+
+def _load(fpath):
+    """Returns persisted store items.
+
+    """
+    try:
+        with open(fpath, 'r') as fstream:
+            obj = json.loads(fstream.read())
+    except (IOError, ValueError):
+        return dict()
+
+    return obj['topics'] if obj.get('version') == _VERSION else dict()
+
+
+def _get_contributions(obj):
+    """Returns contributions of a parsed topic JSON document.
+
+    """
+    content = obj['content']
+
+    return [[sp, content[sp]['values']] for sp in list(content) if content[sp]['values']]
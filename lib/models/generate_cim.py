@@ -8,16 +8,25 @@
 
 """
 import argparse
+import collections
+import hashlib
+import json
 import os
 
 import pyesdoc
 
+from pyesdoc.mp.specializations.utils_cache import get_topic_specialization
 from pyesdoc.ontologies.cim import v2 as cim
 
+from lib.models import cim_mapping_plan
+from lib.models import validate_cim
+from lib.models.utils import DOCUMENT_CACHE
 from lib.models.utils import ModelTopicOutput
+from lib.models.utils import get_document_cache_totals
 from lib.utils import io_mgr
 from lib.utils import logger
 from lib.utils import vocabs
+from lib.utils import workers
 
 
 # Define command line argument parser.
@@ -28,6 +37,22 @@ _ARGS.add_argument(
     dest="institution_id",
     type=str
     )
+_ARGS.add_argument(
+    "--workers",
+    help="Number of worker processes over which sources are distributed",
+    dest="workers",
+    type=int,
+    default=1
+    )
+_ARGS.add_argument(
+    "--force",
+    help="Regenerate CIM files even when their inputs are unchanged",
+    dest="force",
+    action="store_true"
+    )
+
+# MIP era.
+_CMIP6_MIP_ERA = "CMIP6"
 
 # Set of properties injected by machinery.
 _INJECTED_PROPERTIES = {'Name', 'Overview', 'Keywords'}
@@ -35,14 +60,74 @@ _INJECTED_PROPERTIES = {'Name', 'Overview', 'Keywords'}
 # Name of file controlling publication.
 _MODEL_PUBLICATION_FNAME = "model_publication.json"
 
+# Name of file recording input fingerprints of previously generated CIM files.
+_MODEL_CIM_MANIFEST_FNAME = "model_cim_manifest.json"
+
 
 def _main(args):
     """Main entry point.
 
     """
-    # Write a CIM file per CMIP6 institute | source combination.
-    institutes = vocabs.get_institutes(args.institution_id)
-    for i in institutes:
+    # Set jobs: one per CMIP6 institute | source combination whose inputs have changed.
+    manifests = collections.OrderedDict()
+    jobs = []
+    skipped = 0
+    for i, s, settings in _yield_jobs(args.institution_id):
+        if i.canonical_name not in manifests:
+            manifests[i.canonical_name] = (i, _load_manifest(i))
+        manifest = manifests[i.canonical_name][1]
+
+        fingerprint = _get_fingerprint(i, s, settings)
+        if not args.force and _is_unchanged(i, s, manifest, fingerprint):
+            skipped += 1
+            continue
+
+        jobs.append((i, s, settings, fingerprint))
+
+    # Write a CIM file per job as results arrive.
+    reports = []
+    rebuilt = 0
+    cache_stats = []
+    results = workers.yield_results(_get_job_content, [
+        (i.canonical_name, s.canonical_name, settings) for i, s, settings, _ in jobs
+        ], args.workers)
+    for job_idx, (content, errors, job_cache_stats) in enumerate(results):
+        i, s, _, fingerprint = jobs[job_idx]
+        cache_stats.append(job_cache_stats)
+        if content is None:
+            warning = '{} :: {} CIM file not found'
+            warning = warning.format(i.canonical_name, s.canonical_name)
+            logger.log_warning(warning)
+            continue
+
+        # Write CIM file & validation report to fs.
+        io_mgr.write_model_cim(i, s, content)
+        validate_cim.write_report(i, s, errors)
+        if errors:
+            reports.append((i.canonical_name, s.canonical_name, errors))
+        rebuilt += 1
+
+        # Update manifest.
+        manifests[i.canonical_name][1][s.canonical_name] = fingerprint
+
+    # Persist manifests.
+    for i, manifest in manifests.values():
+        io_mgr.write_model_settings(i, _MODEL_CIM_MANIFEST_FNAME, manifest)
+
+    # Emit validation report.
+    validate_cim.log_reports(reports)
+    validate_cim.prune_cache()
+
+    logger.log('sources rebuilt = {} :: sources skipped = {}'.format(rebuilt, skipped), app='SH')
+    logger.log('document cache hits = {} :: document cache misses = {}'.format(
+        *get_document_cache_totals(cache_stats)), app='SH')
+
+
+def _yield_jobs(institution_id):
+    """Yields (institute, source, settings) combinations for which a CIM file is to be generated.
+
+    """
+    for i in vocabs.get_institutes(institution_id):
         # Escape if settings file not found.
         try:
             all_settings = io_mgr.load_model_settings(i, _MODEL_PUBLICATION_FNAME)
@@ -68,16 +153,62 @@ def _main(args):
             if not settings:
                 continue
 
-            # Generate content.
-            content = _get_content(i, s, settings)
-            if content is None:
-                warning = '{} :: {} CIM file not found'
-                warning = warning.format(i.canonical_name, s.canonical_name)
-                logger.log_warning(warning)
-                continue
+            yield i, s, settings
+
+
+def _load_manifest(i):
+    """Returns manifest of input fingerprints used when CIM files were last generated.
+
+    """
+    try:
+        return io_mgr.load_model_settings(i, _MODEL_CIM_MANIFEST_FNAME)
+    except (IOError, ValueError):
+        return collections.OrderedDict()
+
+
+def _get_fingerprint(i, s, settings):
+    """Returns fingerprint of the inputs from which a CIM file is generated.
+
+    """
+    fingerprint = hashlib.md5()
+    fingerprint.update('pyesdoc={}'.format(pyesdoc.__version__))
+    fingerprint.update('settings={}'.format(json.dumps(settings, sort_keys=True)))
+    for t in vocabs.get_model_topics(s):
+        if t.canonical_name not in settings:
+            continue
+        specialization = get_topic_specialization(_CMIP6_MIP_ERA, t.canonical_name)
+        fingerprint.update('topic={}:{}'.format(t.canonical_name, specialization.change_history[-1][0]))
+        try:
+            with open(io_mgr.get_model_topic_json(i, s, t), 'rb') as fstream:
+                fingerprint.update(hashlib.md5(fstream.read()).hexdigest())
+        except IOError:
+            fingerprint.update('-')
+
+    return fingerprint.hexdigest()
+
 
-            # Write CIM file to fs.
-            io_mgr.write_model_cim(i, s, content)
+def _is_unchanged(i, s, manifest, fingerprint):
+    """Returns flag indicating whether the inputs to a CIM file are unchanged since last run.
+
+    """
+    if not os.path.exists(io_mgr.get_model_cim(i, s)):
+        return False
+
+    return manifest.get(s.canonical_name) == fingerprint
+
+
+def _get_job_content(job):
+    """Returns (content, validation errors, document cache stats) tuple for an (institute, source, settings) job.
+
+    Executed within worker processes, hence vocab terms are resolved from identifiers.
+
+    """
+    i = vocabs.get_institute(job[0])
+    s = vocabs.get_source(i, job[1])
+
+    content, errors = _get_content(i, s, job[2])
+
+    return content, errors, DOCUMENT_CACHE.get_stats()
 
 
 def _can_publish(i, s, settings):
@@ -97,22 +228,15 @@ def _get_content(i, s, settings):
     # Map JSON -> CIM.
     doc = _map_model(i, s, accessors)
     if doc is None:
-        return
+        return None, []
 
     # Destructure injected properties.
     _destructure(doc)
 
-    # Emit validation report.
-    errors = pyesdoc.validate(doc)
-    errors = [e for e in errors if
-              e.endswith('values --> is an empty list') == False]
-    if errors:
-        print("INVALID CIM DOCUMENT: {}".format(s))
-        for err in errors:
-            print(err)
+    # Encode as JSON string & validate (cached by content).
+    content = pyesdoc.encode(doc)
 
-    # Return JSON string.
-    return pyesdoc.encode(doc)
+    return content, validate_cim.get_errors(i, s, content, doc)
 
 
 def _get_data_accessors(i, s, settings):
@@ -197,7 +321,7 @@ def _map_model_activity_properties(accessors):
     """
     for accessor in accessors:
         if accessor.specialization.id.endswith('toplevel'):
-            return _map_topics(accessor.specialization['process'], accessor)
+            return _map_sections(accessor)['process']
 
 
 def _map_model_key_properties(accessors):
@@ -206,7 +330,7 @@ def _map_model_key_properties(accessors):
     """
     for accessor in accessors:
         if accessor.specialization.id.endswith('toplevel'):
-            return _map_topic(accessor.specialization['keyprops'], accessor)
+            return _get_section(_map_sections(accessor), 'keyprops')
 
 
 def _map_realms(accessors):
@@ -223,90 +347,90 @@ def _map_realm(specialization, accessor):
     """Maps a specialization to a realm.
 
     """
+    sections = _map_sections(accessor)
+
     r = pyesdoc.create(cim.Realm, project='CMIP6', source='spreadsheet', version=1)
     r.description = specialization.description or specialization.name_camel_case_spaced
     r.name = specialization.name_camel_case_spaced
     r.specialization_id = specialization.id
-    r.key_properties = _map_topic(specialization['keyprops'], accessor)
-    r.grid = _map_topic(specialization['grid'], accessor)
-    r.processes = _map_topics(specialization['process'], accessor)
+    r.key_properties = _get_section(sections, 'keyprops')
+    r.grid = _get_section(sections, 'grid')
+    r.processes = sections['process']
 
     return r if (r.key_properties or r.grid or r.processes) else None
 
 
-def _map_topic(specialization, accessor):
-    """Maps a specialization to a topic.
+def _get_section(sections, type_key):
+    """Returns a mapped topic section of a particular type.
 
     """
-    if specialization is None:
-        return
-    t = _instantiate(specialization, cim.Topic, False)
-    t.properties = _map_properties(specialization.properties, accessor)
-    t.property_sets = _map_property_sets(specialization.property_sets, accessor)
-    t.sub_topics = _map_topics(specialization.sub_topics, accessor)
+    return sections[type_key][0] if sections[type_key] else None
 
-    return t if (t.properties or t.property_sets or t.sub_topics) else None
 
+def _map_sections(accessor):
+    """Maps populated topic sections (key properties, grid, processes) keyed by section type.
 
-def _map_topics(specializations, accessor):
-    """Maps specializations to topics.
+    Only the properties populated within the accessor's content are visited, and only the
+    topics & property sets leading to them are instantiated.
 
     """
-    result = [_map_topic(i, accessor) for i in specializations]
+    plan = cim_mapping_plan.get_plan(accessor.specialization)
 
-    return [i for i in result if i is not None]
+    # Map populated properties & their containers.
+    containers = dict()
+    for specialization_id, path in plan.yield_properties(accessor.content):
+        tp = _map_property(specialization_id, accessor)
+        if tp is None:
+            continue
+        parent = None
+        for container_id in path:
+            if container_id not in containers:
+                containers[container_id] = _map_container(plan, container_id, parent)
+            parent = containers[container_id]
+        parent.properties.append(tp)
+
+    # Set sections in specialization order.
+    result = collections.defaultdict(list)
+    for type_key, container_id in plan.sections:
+        if container_id in containers:
+            result[type_key].append(containers[container_id])
+
+    return result
 
 
-def _map_properties(specializations, accessor):
-    """Maps specializations to properties.
+def _map_container(plan, specialization_id, parent):
+    """Maps a specialization to a topic or property set & appends it to its parent.
 
     """
-    result = [_map_property(i, accessor) for i in specializations]
+    if plan.containers[specialization_id] == cim_mapping_plan.CONTAINER_PROPERTY_SET:
+        container = _instantiate(specialization_id, cim.TopicPropertySet)
+        parent.property_sets.append(container)
+    else:
+        container = _instantiate(specialization_id, cim.Topic)
+        if parent is not None:
+            parent.sub_topics.append(container)
 
-    return [i for i in result if i is not None]
+    return container
 
 
-def _map_property(specialization, accessor):
+def _map_property(specialization_id, accessor):
     """Maps a specialization to a property.
 
     """
-    tp = _instantiate(specialization, cim.TopicProperty, False)
-    tp.values = accessor.get_values(specialization.id)
+    tp = _instantiate(specialization_id, cim.TopicProperty)
+    tp.values = accessor.get_values(specialization_id)
     tp.values = [i for i in tp.values if i is not None]
     tp.values = [i if isinstance(i, (str, unicode)) else unicode(i) for i in tp.values]
 
     return tp if tp.values else None
 
 
-def _map_property_set(specialization, accessor):
-    """Maps a specialization to a property set.
-
-    """
-    tps = _instantiate(specialization, cim.TopicPropertySet, False)
-    tps.properties = [_map_property(i, accessor) for i in specialization.properties]
-    tps.properties = [i for i in tps.properties if i is not None]
-
-    return tps if tps.properties else None
-
-
-def _map_property_sets(specializations, accessor):
-    """Maps specializations to property sets.
-
-    """
-    result = [_map_property_set(i, accessor) for i in specializations]
-
-    return [i for i in result if i is not None]
-
-
-def _instantiate(specialization, cim_type, include_description):
+def _instantiate(specialization_id, cim_type):
     """Instantiates a CIM type instance.
 
     """
     instance = cim_type()
-    if include_description:
-        instance.description = specialization.description or specialization.name_camel_case_spaced
-        instance.name = specialization.name_camel_case_spaced
-    instance.specialization_id = specialization.id
+    instance.specialization_id = specialization_id
 
     return instance
 
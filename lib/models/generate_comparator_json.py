@@ -8,11 +8,18 @@
 
 """
 import argparse
+import collections
 import json
+import os
 
 import pyessv
 
+from lib.models import comparator_shards
+from lib.models.comparator_store import ContributionStore
+from lib.models.utils import DOCUMENT_CACHE
 from lib.models.utils import ModelTopicOutput
+from lib.utils import io_mgr
+from lib.utils import logger
 from lib.utils import vocabs
 
 
@@ -22,57 +29,110 @@ _ARGS = argparse.ArgumentParser("Generates CMIP6 model comparator files.")
 _ARGS.add_argument(
     "--destination",
     help="Folder to which CIM documents will be copied.",
-    default=os.path.join(os.getenv('CMIP6_HOME'), 'repos/libs/esdoc-web-explorer/src/static/cmip6-comparator')
+    default=os.path.join(os.getenv('CMIP6_HOME'), 'repos/libs/esdoc-web-explorer/src/static/cmip6-comparator'),
     dest="destination",
     type=str
     )
+_ARGS.add_argument(
+    "--shard-by",
+    help="Shard key of compressed, columnar edge files written in addition to data.json: institute | topic",
+    dest="shard_by",
+    type=str,
+    choices=(comparator_shards.SHARD_BY_INSTITUTE, comparator_shards.SHARD_BY_TOPIC),
+    default=None
+    )
+_ARGS.add_argument(
+    "--full",
+    help="Re-read all topic files rather than only those changed since the previous run",
+    dest="full",
+    action="store_true"
+    )
 
 
 def _main(args):
     """Main entry point.
 
+    """
+    store = ContributionStore()
+    if args.full:
+        store.clear()
+
+    nodes, edges = build(_yield_contributions(store))
+    store.save()
+    logger.log('topics :: {} unchanged, {} re-read, {} removed'.format(
+        store.hits, store.misses, store.removed), app='SH')
+    logger.log('document cache hits = {} :: document cache misses = {}'.format(
+        DOCUMENT_CACHE.hits, DOCUMENT_CACHE.misses), app='SH')
+
+    # Write to file system.
+    _write(args, nodes, edges)
+    if args.shard_by is not None:
+        comparator_shards.write(os.path.join(args.destination, 'shards'), _get_compact_nodes(nodes), edges, args.shard_by)
+
+
+def build(documentation):
+    """Returns comparator nodes & edges derived from a set of documentation.
+
+    :param iterable documentation: Set of (institute, model, topic, content) tuples.
+
+    :returns: (nodes, edges) pair - nodes being institutes, models, topics, specializations & values.
+    :rtype: tuple
+
     """
     # Initialise nodes / edges.
-    institutes = []
-    models = []
-    topics = []
-    specializations = []
-    values = []
+    institutes = _InterningTable()
+    models = _InterningTable()
+    topics = _InterningTable()
+    specializations = _InterningTable()
+    values = _InterningTable()
     edges = []
 
-    # Iterate documented models & extend nodes & edges. 
-    for i, m, t, content in _yield_documentation():
+    # Iterate documented models & extend nodes & edges.
+    for i, m, t, content in documentation:
         for sp in list(content):
             for v in content[sp]['values']:
-                # Extend nodes.
-                if i not in institutes:
-                    institutes.append(i)
-                if m not in models:
-                    models.append(m)
-                if t not in topics:
-                    topics.append(t)
-                if sp not in specializations:
-                    specializations.append(sp)
-                if v not in values:
-                    values.append(v)
-                
-                # Extend edges.
                 edges.append((
-                    institutes.index(i),
-                    models.index(m),
-                    topics.index(t),
-                    specializations.index(sp),
-                    values.index(v),
+                    institutes.get_id(i),
+                    models.get_id(m),
+                    topics.get_id(t),
+                    specializations.get_id(sp),
+                    values.get_id(v),
                 ))
-    
-    # Write to file system.
-    _write(args, [
-        institutes,
-        models,
-        topics,
-        specializations,
-        values,        
-    ], edges)
+
+    return [
+        institutes.items,
+        models.items,
+        topics.items,
+        specializations.items,
+        values.items,
+    ], edges
+
+
+class _InterningTable(object):
+    """Assigns identifiers to distinct items in order of first insertion.
+
+    Items are deemed distinct as per list membership, i.e. by equality, however lookups are O(1).
+
+    """
+    def __init__(self):
+        """Instance initialiser.
+
+        """
+        self.items = []
+        self._ids = dict()
+
+
+    def get_id(self, item):
+        """Returns identifier of an item, interning it if necessary.
+
+        """
+        try:
+            return self._ids[item]
+        except KeyError:
+            self._ids[item] = len(self.items)
+            self.items.append(item)
+
+        return self._ids[item]
 
 
 def _yield_documentation():
@@ -85,15 +145,22 @@ def _yield_documentation():
             yield i, m, t, output.content
 
 
+def _yield_contributions(store):
+    """Yields documentation for map/reduce job - re-reading only topic files changed since previous run.
+
+    """
+    for i, m, t in vocabs.yield_topics(None):
+        contributions = store.get(io_mgr.get_model_topic_json(i, m, t))
+        if contributions:
+            yield i, m, t, collections.OrderedDict((sp, {'values': v}) for sp, v in contributions)
+
+
 def _write(args, nodes, edges):
     """Writes data to file system.
     
     """
     # Compact nodes.
-    _nodes = []
-    for idx, i in enumerate(nodes):  
-        for jdx, j in enumerate(i):
-            _nodes.append((idx, jdx, j.canonical_name if isinstance(j, pyessv.Term) else j))
+    _nodes = _get_compact_nodes(nodes)
 
     # Persist data.
     fpath = "{}/data.json".format(args.destination)
@@ -105,6 +172,18 @@ def _write(args, nodes, edges):
     }))
 
 
+def _get_compact_nodes(nodes):
+    """Returns nodes as a flat list of (node type, node id, node name) tuples.
+
+    """
+    _nodes = []
+    for idx, i in enumerate(nodes):
+        for jdx, j in enumerate(i):
+            _nodes.append((idx, jdx, j.canonical_name if isinstance(j, pyessv.Term) else j))
+
+    return _nodes
+
+
 # Main entry point.
 if __name__ == '__main__':
     _main(_ARGS.parse_args())
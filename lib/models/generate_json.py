@@ -9,14 +9,22 @@
 """
 import argparse
 import collections
+import hashlib
 import os
+import zipfile
+from xml.etree import cElementTree
+from xml.etree import ElementTree
 
 import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
 import pyessv
+from pyesdoc.mp.specializations.utils_cache import get_topic_specialization
 
+from lib.models import xlsx_reader
 from lib.utils import io_mgr
 from lib.utils import logger
 from lib.utils import vocabs
+from lib.utils import workers
 
 
 
@@ -28,6 +36,21 @@ _ARGS.add_argument(
     dest="institution_id",
     type=str
     )
+_ARGS.add_argument(
+    "--workers",
+    help="Number of worker processes over which topics are distributed",
+    dest="workers",
+    type=int,
+    default=1
+    )
+_ARGS.add_argument(
+    "--xls-reader",
+    help="Spreadsheet reader: stream (default) or openpyxl",
+    dest="xls_reader",
+    type=str,
+    choices=("stream", "openpyxl"),
+    default="stream"
+    )
 
 # MIP era.
 _CMIP6_MIP_ERA = "cmip6"
@@ -35,39 +58,161 @@ _CMIP6_MIP_ERA = "cmip6"
 # Name of file controlling publication.
 _MODEL_PUBLICATION_FNAME = "model_publication.json"
 
+# Spreadsheet readers.
+_XLS_READER_OPENPYXL = "openpyxl"
+_XLS_READER_STREAM = "stream"
+
+# Name of file recording inputs of previously generated JSON files.
+_MODEL_JSON_MANIFEST_FNAME = "model_json_manifest.json"
+
+# Errors raised when reading a corrupt or invalid spreadsheet.
+_SPREADSHEET_ERRORS = (
+    cElementTree.ParseError,
+    ElementTree.ParseError,
+    InvalidFileException,
+    IOError,
+    zipfile.BadZipfile,
+)
+
 
 def _main(args):
     """Main entry point.
 
     """
-    for i, s, t in vocabs.yield_topics(args.institution_id):
+    manifests = collections.OrderedDict()
+    warnings = []
+    jobs = []
+    skipped = 0
+    for idx, (i, s, t) in enumerate(vocabs.yield_topics(args.institution_id)):
+        # Set manifest of previous run.
+        if i.canonical_name not in manifests:
+            manifests[i.canonical_name] = (i, _load_manifest(i))
+        manifest = manifests[i.canonical_name][1]
+
         try:
-            wb = _get_spreadsheet(i, s, t)
-        except IOError:            
-            warning = '{} :: {} :: {} :: spreadsheet not found'
-            warning = warning.format(i.canonical_name, s.canonical_name, t.canonical_name)
-            logger.log_warning(warning)
-            continue        
+            fingerprint = _get_fingerprint(i, s, t)
+        except IOError:
+            warnings.append((idx, _get_warning(i, s, t, 'spreadsheet not found')))
+            continue
+
+        # Escape if inputs are unchanged.
+        if _is_unchanged(i, s, t, manifest, fingerprint):
+            skipped += 1
+            continue
 
-        # Set JSON content.
-        content = _get_content(i, s, t, wb)
+        jobs.append((idx, i, s, t, fingerprint))
+
+    # Set JSON content - workers are forked after specializations have been loaded.
+    rebuilt = 0
+    results = workers.yield_results(_get_job_content, [
+        (i.canonical_name, s.canonical_name, t.canonical_name, args.xls_reader)
+        for _, i, s, t, _ in jobs
+        ], args.workers)
+    for job_idx, (content, warning) in enumerate(results):
+        idx, i, s, t, fingerprint = jobs[job_idx]
+        if warning is not None:
+            warnings.append((idx, warning))
+            continue
 
         # Write JSON file.
         io_mgr.write_model_topic_json(i, s, t, content)
+        rebuilt += 1
+
+        # Update manifest.
+        manifest = manifests[i.canonical_name][1]
+        manifest.setdefault(s.canonical_name, collections.OrderedDict())
+        manifest[s.canonical_name][t.canonical_name] = fingerprint
+
+    # Persist manifests.
+    for i, manifest in manifests.values():
+        io_mgr.write_model_settings(i, _MODEL_JSON_MANIFEST_FNAME, manifest)
+
+    # Emit warnings in topic order.
+    for _, warning in sorted(warnings):
+        logger.log_warning(warning)
+
+    logger.log('topics rebuilt = {} :: topics skipped = {}'.format(rebuilt, skipped), app='SH')
+
+
+def _get_job_content(job):
+    """Returns (content, warning) pair for an (institute, source, topic) job.
+
+    Executed within worker processes, hence vocab terms are resolved from identifiers.
+
+    """
+    i = vocabs.get_institute(job[0])
+    s = vocabs.get_source(i, job[1])
+    t = vocabs.get_source_topic(s, job[2])
+    try:
+        fpath = _get_spreadsheet(i, s, t)
+    except IOError:
+        return None, _get_warning(i, s, t, 'spreadsheet not found')
+
+    try:
+        return _get_content(i, s, t, fpath, job[3]), None
+    except _SPREADSHEET_ERRORS as err:
+        return None, _get_warning(i, s, t, 'spreadsheet unreadable :: {}'.format(err))
+
+
+def _get_warning(i, s, t, msg):
+    """Returns a warning message associated with an (institute, source, topic) job.
+
+    """
+    return '{} :: {} :: {} :: {}'.format(i.canonical_name, s.canonical_name, t.canonical_name, msg)
+
+
+def _load_manifest(i):
+    """Returns manifest of inputs used when JSON files were last generated.
+
+    """
+    try:
+        return io_mgr.load_model_settings(i, _MODEL_JSON_MANIFEST_FNAME)
+    except (IOError, ValueError):
+        return collections.OrderedDict()
+
+
+def _get_fingerprint(i, s, t):
+    """Returns fingerprint of the inputs from which a JSON file is generated.
+
+    """
+    fpath = io_mgr.get_model_topic_xls(i, s, t)
+    if not os.path.exists(fpath):
+        raise IOError()
+
+    with open(fpath, 'rb') as fstream:
+        xls_hash = hashlib.md5(fstream.read()).hexdigest()
+
+    specialization = get_topic_specialization(_CMIP6_MIP_ERA, t.canonical_name)
+
+    obj = collections.OrderedDict()
+    obj['xlsHash'] = xls_hash
+    obj['specializationVersion'] = specialization.change_history[-1][0]
+
+    return obj
+
+
+def _is_unchanged(i, s, t, manifest, fingerprint):
+    """Returns flag indicating whether the inputs to a JSON file are unchanged since last run.
+
+    """
+    if not os.path.exists(io_mgr.get_model_topic_json(i, s, t)):
+        return False
+
+    return manifest.get(s.canonical_name, {}).get(t.canonical_name) == fingerprint
 
 
 def _get_spreadsheet(i, s, t):
-    """Returns a model topic spreadsheet for processing.
+    """Returns path to a model topic spreadsheet for processing.
 
     """
     fpath = io_mgr.get_model_topic_xls(i, s, t)
     if not os.path.exists(fpath):
         raise IOError()
 
-    return openpyxl.load_workbook(fpath, read_only=True)
+    return fpath
 
 
-def _get_content(i, s, t, wb):
+def _get_content(i, s, t, fpath, xls_reader=_XLS_READER_STREAM):
     """Returns content to be written to file system.
 
     """
@@ -81,6 +226,19 @@ def _get_content(i, s, t, wb):
     obj['content'] = collections.OrderedDict()
 
     # Process spreadsheet.
+    if xls_reader == _XLS_READER_OPENPYXL:
+        _set_openpyxl_content(obj, openpyxl.load_workbook(fpath, read_only=True))
+    else:
+        for specialization_id, values in xlsx_reader.yield_content(fpath):
+            obj['content'][specialization_id] = {'values': values}
+
+    return obj
+
+
+def _set_openpyxl_content(obj, wb):
+    """Sets content parsed from a workbook opened with openpyxl.
+
+    """
     for idx, ws in enumerate(wb):
         # Process citations/responsible parties.
         if idx == 1:
@@ -90,8 +248,6 @@ def _get_content(i, s, t, wb):
         # Extract specialization entries.
         elif idx > 1:
             _set_xls_content(obj, ws)
-    
-    return obj
 
 
 def _set_xls_content(obj, ws):
@@ -8,15 +8,24 @@
 
 """
 import argparse
+import collections
 import datetime as dt
+import hashlib
 import os
+import shutil
+import tempfile
+import time
 
-import latex
 from tornado import template
 
+from lib.models import latex_builder
+from lib.models.utils import DOCUMENT_CACHE
 from lib.models.utils import ModelTopicOutput
+from lib.models.utils import get_document_cache_totals
 from lib.utils import io_mgr
+from lib.utils import logger
 from lib.utils import vocabs
+from lib.utils import workers
 
 
 # Define command line argument parser.
@@ -27,6 +36,40 @@ _ARGS.add_argument(
     dest="institution_id",
     type=str
     )
+_ARGS.add_argument(
+    "--renderer",
+    help="Renderer: latex (default) for official PDFs or html for fast previews",
+    dest="renderer",
+    type=str,
+    choices=("latex", "html"),
+    default="latex"
+    )
+_ARGS.add_argument(
+    "--workers",
+    help="Number of worker processes over which topics are distributed",
+    dest="workers",
+    type=int,
+    default=1
+    )
+_ARGS.add_argument(
+    "--timeout",
+    help="Number of seconds after which compilation of a topic is abandoned",
+    dest="timeout",
+    type=int,
+    default=600
+    )
+_ARGS.add_argument(
+    "--no-format",
+    help="Flag indicating whether topics are to be compiled without a precompiled preamble format",
+    dest="no_format",
+    action="store_true"
+    )
+_ARGS.add_argument(
+    "--force",
+    help="Flag indicating whether PDFs are to be compiled even if their LaTeX source is unchanged",
+    dest="force",
+    action="store_true"
+    )
 
 # MIP era.
 _CMIP6_MIP_ERA = "cmip6"
@@ -35,28 +78,239 @@ _CMIP6_MIP_ERA = "cmip6"
 _TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates_pdf")
 _TEMPLATES = template.Loader(_TEMPLATES_PATH)
 
+# Preview template cache.
+_HTML_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates_html")
+_HTML_TEMPLATES = template.Loader(_HTML_TEMPLATES_PATH)
+
+# Renderers.
+_RENDERER_HTML = "html"
+_RENDERER_LATEX = "latex"
+
+# Templates: full document, document body (i.e. excluding preamble) & preamble.
+_TEMPLATE_MAIN = "main.tornado"
+_TEMPLATE_DOCUMENT = "document.tornado"
+_TEMPLATE_PREAMBLE = "preamble.tornado"
+
+# Name of cache folder in which precompiled preamble formats are stored.
+_FORMAT_CACHE_NAME = 'latex_formats'
+
 
 def _main(args):
     """Main entry point.
 
     """
-    # Load latex template.
-    template = _TEMPLATES.load("main.tornado")
+    if args.renderer == _RENDERER_HTML:
+        _write_previews(args)
+        return
 
-    # Write PDF files.
-    for i, s, t in vocabs.yield_topics(args.institution_id):
+    # Load latex templates - prior to forking workers.
+    _TEMPLATES.load(_TEMPLATE_MAIN)
+    _TEMPLATES.load(_TEMPLATE_DOCUMENT)
+
+    # Set precompiled preamble format - falls back to compiling preamble per topic.
+    fmt = None
+    if not args.no_format:
         try:
-            _write(template, i, s, t)
+            fmt = get_format(args.timeout)
         except Exception as err:
-            fname = '{}_{}_{}_{}.pdf'.format(
-                _CMIP6_MIP_ERA, i.canonical_name, s.canonical_name, t.canonical_name
-                )
-            print('ERROR --> {}'.format(fname))
-            continue
+            logger.log_warning('preamble format unavailable :: {}'.format(latex_builder.get_error(err)))
 
+    # Set hashes of LaTeX sources from which PDFs were last compiled.
+    indexes = collections.OrderedDict()
+    topics = []
+    for i, s, t in vocabs.yield_topics(args.institution_id):
+        if (i, s) not in indexes:
+            indexes[(i, s)] = dict() if args.force else _load_index(i, s)
+        topics.append((i, s, t))
 
-def _write(template, i, s, t):
-    """Main entry point.
+    # Workers compile within their own scratch folder beneath a shared root.
+    scratch = tempfile.mkdtemp(prefix='cmip6-pdf-')
+    jobs = [(i.canonical_name, s.canonical_name, t.canonical_name, scratch, args.timeout,
+             indexes[(i, s)].get(t.canonical_name), fmt) for i, s, t in topics]
+
+    # Write PDF files.
+    failures = []
+    hits = 0
+    cache_stats = []
+    try:
+        results = workers.yield_results(_write_job, jobs, args.workers)
+        for job_idx, (latex_hash, is_compiled, error, job_cache_stats) in enumerate(results):
+            i, s, t = topics[job_idx]
+            cache_stats.append(job_cache_stats)
+            if error is not None:
+                failures.append((_get_fname(jobs[job_idx]), error))
+                indexes[(i, s)].pop(t.canonical_name, None)
+            else:
+                indexes[(i, s)][t.canonical_name] = latex_hash
+                hits += 0 if is_compiled else 1
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    # Update indexes.
+    for (i, s), index in indexes.items():
+        io_mgr.write_model_pdf_index(i, s, index)
+
+    # Report.
+    logger.log('topics = {} :: failed = {}'.format(len(jobs), len(failures)), app='SH')
+    logger.log('cache hits = {} :: cache misses = {}'.format(hits, len(jobs) - hits), app='SH')
+    logger.log('document cache hits = {} :: document cache misses = {}'.format(
+        *get_document_cache_totals(cache_stats)), app='SH')
+    for fname, error in failures:
+        logger.log_warning('FAILED --> {} :: {}'.format(fname, error))
+
+
+def _write_previews(args):
+    """Writes HTML previews - rendered without LaTeX.
+
+    """
+    # Load (i.e. compile) template - prior to forking workers.
+    _HTML_TEMPLATES.load(_TEMPLATE_MAIN)
+
+    jobs = [(i.canonical_name, s.canonical_name, t.canonical_name)
+            for i, s, t in vocabs.yield_topics(args.institution_id)]
+
+    # Write HTML files.
+    failures = []
+    elapsed = 0.0
+    cache_stats = []
+    results = workers.yield_results(_write_preview_job, jobs, args.workers)
+    for job_idx, (duration, error, job_cache_stats) in enumerate(results):
+        elapsed += duration
+        cache_stats.append(job_cache_stats)
+        if error is not None:
+            failures.append((_get_fname(jobs[job_idx], 'html'), error))
+
+    # Report.
+    logger.log('topics = {} :: failed = {} :: {:.1f}ms per topic'.format(
+        len(jobs), len(failures), 1000 * elapsed / max(len(jobs), 1)), app='SH')
+    logger.log('document cache hits = {} :: document cache misses = {}'.format(
+        *get_document_cache_totals(cache_stats)), app='SH')
+    for fname, error in failures:
+        logger.log_warning('FAILED --> {} :: {}'.format(fname, error))
+
+
+def _write_preview_job(job):
+    """Writes HTML preview associated with an (institute, source, topic) job.
+
+    :returns: (render duration, error description, document cache stats) tuple.
+
+    """
+    i = vocabs.get_institute(job[0])
+    s = vocabs.get_source(i, job[1])
+    t = vocabs.get_source_topic(s, job[2])
+
+    started = time.time()
+    try:
+        _write_preview(i, s, t)
+    except Exception as err:
+        return time.time() - started, str(err), DOCUMENT_CACHE.get_stats()
+
+    return time.time() - started, None, DOCUMENT_CACHE.get_stats()
+
+
+def _write_job(job):
+    """Writes PDF associated with an (institute, source, topic) job.
+
+    Executed within worker processes, hence vocab terms are resolved from identifiers.
+
+    :returns: (LaTeX source hash, compilation flag, error description, document cache stats) tuple.
+
+    """
+    i = vocabs.get_institute(job[0])
+    s = vocabs.get_source(i, job[1])
+    t = vocabs.get_source_topic(s, job[2])
+
+    # Reset worker's scratch folder.
+    folder = os.path.join(job[3], str(os.getpid()))
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+
+    try:
+        latex_hash, is_compiled = _write(i, s, t, folder, job[4], job[5], job[6])
+    except Exception as err:
+        return None, True, latex_builder.get_error(err), DOCUMENT_CACHE.get_stats()
+
+    return latex_hash, is_compiled, None, DOCUMENT_CACHE.get_stats()
+
+
+def get_format(timeout=None):
+    """Returns path to format precompiled from document preamble - built once per preamble & engine version.
+
+    :param int timeout: Number of seconds after which compilation is abandoned.
+
+    """
+    with open(os.path.join(_TEMPLATES_PATH, _TEMPLATE_PREAMBLE), 'r') as fstream:
+        preamble = fstream.read()
+
+    fname = 'preamble_{}.fmt'.format(
+        hashlib.md5('{}:{}'.format(latex_builder.get_engine_version(), preamble)).hexdigest())
+    fpath = os.path.join(io_mgr.get_cache_folder(_FORMAT_CACHE_NAME), fname)
+    if not os.path.exists(fpath):
+        latex_builder.build_format(preamble, fpath, timeout)
+
+    return fpath
+
+
+def _load_index(i, s):
+    """Returns index of LaTeX source hashes of a model's PDFs.
+
+    """
+    try:
+        return io_mgr.load_model_pdf_index(i, s)
+    except (IOError, ValueError):
+        return dict()
+
+
+def _get_fname(job, extension='pdf'):
+    """Returns name of file associated with an (institute, source, topic) job.
+
+    """
+    return '{}_{}_{}_{}.{}'.format(_CMIP6_MIP_ERA, job[0], job[1], job[2], extension)
+
+
+def compile_pdf(i, s, t, folder, timeout, fmt=None):
+    """Returns a model topic PDF compiled within a scratch folder - nothing is written to the archive.
+
+    :param str folder: Scratch folder within which compilation is performed.
+    :param int timeout: Number of seconds after which compilation is abandoned.
+    :param str fmt: Path to a precompiled preamble format.
+
+    :returns: PDF content.
+    :rtype: str
+
+    """
+    as_latex, _ = _get_latex(i, s, t, fmt)
+
+    return latex_builder.build_pdf(as_latex, folder, timeout, fmt)
+
+
+def _write(i, s, t, folder, timeout, previous_hash, fmt=None):
+    """Writes a model topic PDF - unless its LaTeX source is unchanged since last compiled.
+
+    If a precompiled preamble format is passed then only the document body is compiled.
+
+    :returns: (LaTeX source hash, compilation flag) pair.
+
+    """
+    as_latex, latex_hash = _get_latex(i, s, t, fmt)
+
+    # Skip compilation if source is unchanged.
+    if latex_hash == previous_hash and os.path.exists(io_mgr.get_model_topic_pdf(i, s, t)):
+        return latex_hash, False
+
+    # Generate PDF.
+    as_pdf = latex_builder.build_pdf(as_latex, folder, timeout, fmt)
+
+    # Write pdf.
+    io_mgr.write_model_topic_pdf(i, s, t, as_pdf)
+
+    return latex_hash, True
+
+
+def _get_latex(i, s, t, fmt=None):
+    """Returns LaTeX source of a model topic PDF - body only if a precompiled preamble format is passed.
+
+    :returns: (LaTeX source, LaTeX source hash) pair.
 
     """
     # Set documentation wrapper.
@@ -66,11 +320,12 @@ def _write(template, i, s, t):
     _set_identifiers(doc.specialization)
 
     # Generate latex.
-    as_latex = template.generate(
+    now = dt.datetime.now()
+    as_latex = _TEMPLATES.load(_TEMPLATE_MAIN if fmt is None else _TEMPLATE_DOCUMENT).generate(
         topic=doc.specialization,
         topic_label=t.label,
         DOC=doc,
-        now=dt.datetime.now(),
+        now=now,
         _str=_str
         )
 
@@ -78,11 +333,39 @@ def _write(template, i, s, t):
     as_latex = as_latex.replace('&amp;', 'and')
     as_latex = as_latex.replace('&quot;', '"')
 
-    # Generate PDF.
-    as_pdf = latex.build_pdf(as_latex)
+    return as_latex, _get_hash(as_latex, now, fmt)
 
-    # Write pdf.
-    io_mgr.write_model_topic_pdf(i, s, t, as_pdf)
+
+def _get_hash(as_latex, now, fmt=None):
+    """Returns hash of a LaTeX source (and format compiled against), excluding generation date declared in frontis.
+
+    """
+    as_latex = as_latex.replace(unicode(now)[0:10].encode('utf-8'), '', 1)
+
+    return hashlib.md5('{}:{}'.format(os.path.basename(fmt or ''), as_latex)).hexdigest()
+
+
+def _write_preview(i, s, t):
+    """Writes a model topic HTML preview.
+
+    """
+    # Set documentation wrapper.
+    doc = ModelTopicOutput.create(i, s, t)
+
+    # Set identifiers used for indentation purposes.
+    _set_identifiers(doc.specialization)
+
+    # Generate html.
+    as_html = _HTML_TEMPLATES.load(_TEMPLATE_MAIN).generate(
+        topic=doc.specialization,
+        topic_label=t.label,
+        DOC=doc,
+        now=dt.datetime.now(),
+        _str=_str_html
+        )
+
+    # Write html.
+    io_mgr.write_model_topic_html(i, s, t, as_html)
 
 
 def _set_identifiers(t):
@@ -128,6 +411,22 @@ def _str(val):
     return val
 
 
+def _str_html(val):
+    """Formats a string value for an HTML preview - unlike LaTeX, unicode is retained.
+
+    """
+    if val is None:
+        return ''
+    elif not isinstance(val, basestring):
+        return unicode(val)
+
+    val = val.strip()
+    if len(val) == 0:
+        return ''
+
+    return val[0].upper() + val[1:]
+
+
 # Main entry point.
 if __name__ == '__main__':
     _main(_ARGS.parse_args())
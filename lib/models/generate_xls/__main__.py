@@ -8,23 +8,19 @@
 
 """
 import argparse
-import datetime as dt
 import os
+import resource
+import time
 
-import xlsxwriter
-
-import pyesdoc
 import pyessv
 
-from lib.models.utils import ModelTopicOutput
+from lib.models.utils import DOCUMENT_CACHE
+from lib.models.utils import get_document_cache_totals
+from lib.utils import logger
 from lib.utils import vocabs
-from write_citations_and_parties import write as write_citations_and_parties
-from write_frontis import write as write_frontis
-from write_property_value import write as write_property_value
-from write_property import write as write_property
-from write_propertyset import write as write_propertyset
-from write_subtopic import write as write_subtopic
-from write_topic import write as write_topic
+from lib.utils import workers
+from spreadsheet import Spreadsheet
+from template import clear_cache as clear_template_cache
 
 
 
@@ -36,114 +32,68 @@ _ARGS.add_argument(
     dest="institution_id",
     type=str
     )
-
-# MIP era.
-_CMIP6_MIP_ERA = "cmip6"
-
-# Generator version.
-_VERSION = '1.0.0'
+_ARGS.add_argument(
+    "--workers",
+    help="Number of worker processes over which topics are distributed",
+    dest="workers",
+    type=int,
+    default=1
+    )
+_ARGS.add_argument(
+    "--clear-templates",
+    help="Flag indicating whether cached topic workbook templates are to be deleted beforehand",
+    dest="clear_templates",
+    action="store_true"
+    )
 
 
 def _main(args):
     """Main entry point.
 
     """
-    institutes = vocabs.get_institutes(args.institution_id)
-    for i in institutes:
+    if args.clear_templates:
+        logger.log('templates deleted = {}'.format(clear_template_cache()), app='SH')
+
+    jobs = []
+    for i in vocabs.get_institutes(args.institution_id):
         for s in vocabs.get_institute_sources(i):
             for t in pyessv.ESDOC.cmip6.get_model_topics(s):
-                xl = Spreadsheet(i, s, t)
-                xl.write()
+                jobs.append((i.canonical_name, s.canonical_name, t.canonical_name))
+
+    # Write workbooks - workers are forked after vocabs & specializations have been loaded.
+    peaks = dict()
+    cache_stats = []
+    results = workers.yield_results(_write_job, jobs, args.workers)
+    for job_idx, (pid, peak, elapsed, job_cache_stats) in enumerate(results):
+        peaks[pid] = max(peak, peaks.get(pid, 0))
+        cache_stats.append(job_cache_stats)
+        logger.log('{} :: {:.3f}s'.format(' :: '.join(jobs[job_idx]), elapsed), app='SH')
+
+    # Report peak memory usage.
+    logger.log('workbooks = {}'.format(len(jobs)), app='SH')
+    logger.log('document cache hits = {} :: document cache misses = {}'.format(
+        *get_document_cache_totals(cache_stats)), app='SH')
+    for pid in sorted(peaks):
+        logger.log('worker {} :: peak RSS = {:.1f} MB'.format(pid, peaks[pid] / 1024.0), app='SH')
+
+
+def _write_job(job):
+    """Writes workbook associated with an (institute, source, topic) job.
 
+    Executed within worker processes, hence vocab terms are resolved from identifiers.
 
-class Spreadsheet(object):
-    """Wraps XLS workbook being generated.
+    :returns: (process id, peak resident set size in KB, elapsed seconds, document cache stats) tuple.
 
     """
-    def __init__(self, i, s, t):
-        """Instance constructor.
-
-        """
-        self.doc = ModelTopicOutput.create(i, s, t)
-        self.institution_id = i.canonical_name
-        self.t = self.doc.specialization
-        self.topic_label = t.label
-        self.topic_id = t.canonical_name
-        self.p = None
-        self.ps = None
-        self.p_values = []
-        self.source_id = s.canonical_name
-        self.st = None
-        self.wb = None
-        self.ws = None
-        self.ws_row = 0
-        self.CMIP6_MIP_ERA = _CMIP6_MIP_ERA
-        self.VERSION = _VERSION
-
-
-    def write(self):
-        """Write workbook.
-
-        """
-        self.set_identifiers()
-
-        write_topic(self)
-        write_frontis(self)
-        write_citations_and_parties(self)
-
-        for st in self.t.sub_topics:
-            self.st = st
-            self.ps = None
-            self.p = None
-            self.p_values = []
-            write_subtopic(self)
-
-            for ps in st.all_property_containers:
-                self.ps = ps
-                self.p = None
-                self.p_values = []
-                write_propertyset(self)
-
-                for p in ps.properties:
-                    self.p = p
-                    self.p_values = [] if p is None else self.doc.get_values(p.id)
-                    write_property(self)
-                    write_property_value(self)
-
-        self.wb.close()
-
-
-    def set_identifiers(self):
-        """Initialises property & property set identifiers.
-
-        """
-        idx1 = 0
-        for pc in self.t.all_property_containers:
-            level = len(pc.id.split('.'))
-            if level == 3:
-                idx1 += 1
-                idx2 = 1
-                idx3 = 1
-            elif level == 4:
-                idx2 += 1
-                idx3 = 1
-            elif level == 5:
-                idx3 += 1
-            pc.idx = '{}.{}.{}'.format(idx1, idx2, idx3)
-            for idx, p in enumerate(pc.properties):
-                p.idx = '{}.{}'.format(pc.idx, idx + 1)
-
-
-    def create_format(self, font_size=12):
-        """Returns a cell formatter.
-
-        """
-        f = self.wb.add_format()
-        f.set_align('vcenter')
-        f.set_font_name('Helvetica Neue')
-        f.set_font_size(font_size)
-
-        return f
+    started = time.time()
+    i = vocabs.get_institute(job[0])
+    s = vocabs.get_source(i, job[1])
+    for t in pyessv.ESDOC.cmip6.get_model_topics(s):
+        if t.canonical_name == job[2]:
+            Spreadsheet(i, s, t).write()
+
+    return os.getpid(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, time.time() - started, \
+           DOCUMENT_CACHE.get_stats()
 
 
 # Entry point.
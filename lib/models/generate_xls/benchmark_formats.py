@@ -0,0 +1,86 @@
+"""
+.. module:: generate_xls/benchmark_formats.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Benchmarks cell format registry used when generating CMIP6 model XLS files.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from lib.utils import logger
+from lib.utils import vocabs
+from spreadsheet import Spreadsheet
+
+
+
+# Define command line argument parser.
+_ARGS = argparse.ArgumentParser("Benchmarks CMIP6 model XLS cell format registry.")
+_ARGS.add_argument(
+    "--institution-id",
+    help="An institution identifier",
+    dest="institution_id",
+    type=str,
+    default="ipsl"
+    )
+_ARGS.add_argument(
+    "--source-id",
+    help="A model source identifier",
+    dest="source_id",
+    type=str,
+    default="ipsl-cm6a-lr"
+    )
+_ARGS.add_argument(
+    "--topic-id",
+    help="A model topic identifier",
+    dest="topic_id",
+    type=str,
+    default="atmos"
+    )
+
+
+class _UnregisteredSpreadsheet(Spreadsheet):
+    """Spreadsheet that adds a new format per call, i.e. as prior to the format registry.
+
+    """
+    def create_format(self, font_size=12, **properties):
+        """Returns a new cell formatter.
+
+        """
+        properties['font_name'] = 'Helvetica Neue'
+        properties['font_size'] = font_size
+        properties.setdefault('valign', 'vcenter')
+
+        return self.wb.add_format(properties)
+
+
+def _main(args):
+    """Main entry point.
+
+    """
+    i = vocabs.get_institute(args.institution_id)
+    s = vocabs.get_source(i, args.source_id)
+    t = vocabs.get_source_topic(s, args.topic_id)
+
+    for label, cls in (('unregistered', _UnregisteredSpreadsheet), ('registered', Spreadsheet)):
+        # Workbooks are written to a scratch file, leaving the institute's workbook untouched.
+        fd, fpath = tempfile.mkstemp(prefix='cmip6-xls-', suffix='.xlsx')
+        os.close(fd)
+        try:
+            xl = cls(i, s, t, fpath)
+            started = time.time()
+            xl.write()
+            elapsed = time.time() - started
+            logger.log('{} :: formats = {} :: size = {} bytes :: {:.3f}s'.format(
+                label, len(xl.wb.formats), os.path.getsize(fpath), elapsed), app='SH')
+        finally:
+            os.remove(fpath)
+
+
+# Main entry point.
+if __name__ == '__main__':
+    _main(_ARGS.parse_args())
@@ -0,0 +1,83 @@
+"""
+.. module:: generate_xls/spreadsheet.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Wraps a CMIP6 model topic XLS workbook being generated.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import collections
+
+from lib.models.utils import ModelTopicOutput
+from template import get_template
+from write_topic import write as write_topic
+
+
+# MIP era.
+_CMIP6_MIP_ERA = "cmip6"
+
+# Generator version.
+_VERSION = '1.0.0'
+
+
+class Spreadsheet(object):
+    """Wraps XLS workbook being generated.
+
+    """
+    def __init__(self, i, s, t, fpath=None):
+        """Instance constructor.
+
+        :param str fpath: Path to workbook - defaults to the institute's model topic workbook.
+
+        """
+        self.choices = collections.OrderedDict()
+        self.doc = ModelTopicOutput.create(i, s, t)
+        self.formats = dict()
+        self.fpath = fpath
+        self.institution_id = i.canonical_name
+        self.t = self.doc.specialization
+        self.topic_label = t.label
+        self.topic_id = t.canonical_name
+        self.p = None
+        self.ps = None
+        self.p_values = []
+        self.source_id = s.canonical_name
+        self.st = None
+        self.wb = None
+        self.ws = None
+        self.ws_row = 0
+        self.CMIP6_MIP_ERA = _CMIP6_MIP_ERA
+        self.VERSION = _VERSION
+
+
+    def write(self):
+        """Write workbook - by injecting identifiers & values into the topic's template.
+
+        """
+        write_topic(self)
+        get_template(self).replay(self)
+
+        self.wb.close()
+
+
+    def create_format(self, font_size=12, **properties):
+        """Returns a cell formatter - created once per distinct set of properties per workbook.
+
+        As formatters are shared they must not be modified after creation.
+
+        :param int font_size: Font size.
+        :param dict properties: xlsxwriter format properties, e.g. bold=True.
+
+        """
+        properties['font_name'] = 'Helvetica Neue'
+        properties['font_size'] = font_size
+        properties.setdefault('valign', 'vcenter')
+
+        key = tuple(sorted(properties.items()))
+        try:
+            return self.formats[key]
+        except KeyError:
+            self.formats[key] = self.wb.add_format(properties)
+
+        return self.formats[key]
@@ -0,0 +1,362 @@
+"""
+.. module:: generate_xls/template.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Value free topic workbook templates, compiled once per specialization version.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import collections
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+from lib.utils import io_mgr
+from write_choices import write as write_choices
+from write_citations_and_parties import write as write_citations_and_parties
+from write_frontis import write as write_frontis
+from write_property_value import write as write_property_value
+from write_property import write as write_property
+from write_propertyset import write as write_propertyset
+from write_subtopic import write as write_subtopic
+
+
+
+# Name of cache folder in which compiled templates are stored.
+_CACHE_NAME = 'xls_templates'
+
+# Hash of template compiler & worksheet writer sources - templates are recompiled whenever either changes.
+_SOURCE_HASH = hashlib.md5(''.join(inspect.getsource(i) for i in (
+    sys.modules[__name__],
+    inspect.getmodule(write_choices),
+    inspect.getmodule(write_citations_and_parties),
+    inspect.getmodule(write_frontis),
+    inspect.getmodule(write_property_value),
+    inspect.getmodule(write_property),
+    inspect.getmodule(write_propertyset),
+    inspect.getmodule(write_subtopic),
+    ))).hexdigest()[:12]
+
+# Template operation kinds.
+_OP_CALL = 'call'
+_OP_SHEET = 'sheet'
+_OP_VALUES = 'values'
+
+# Positions of row arguments of recorded worksheet calls.
+_ROW_ARGS = {
+    'data_validation': (0, 2),
+    'set_row': (0, ),
+    'write': (0, ),
+}
+
+# Placeholders of institute specific cell values.
+_PLACEHOLDER_INSTITUTE = '$INSTITUTE$'
+_PLACEHOLDER_SOURCE = '$SOURCE$'
+_PLACEHOLDER_TOPIC = '$TOPIC$'
+
+# In-process template cache.
+_TEMPLATES = dict()
+
+
+class Template(object):
+    """A value free topic workbook, i.e. a sequence of worksheet operations.
+
+    Value rows are represented by slots, at replay time subsequent rows are shifted
+    by the number of rows written into each slot.
+
+    """
+    def __init__(self, obj):
+        """Instance initialiser.
+
+        """
+        self.formats = obj['formats']
+        self.ops = obj['ops']
+
+
+    def replay(self, spreadsheet):
+        """Writes worksheets of a spreadsheet, injecting its identifiers & values.
+
+        :param Spreadsheet spreadsheet: Spreadsheet being generated.
+
+        """
+        formats = [spreadsheet.create_format(**i) for i in self.formats]
+        placeholders = {
+            _PLACEHOLDER_INSTITUTE: spreadsheet.doc.institute.upper(),
+            _PLACEHOLDER_SOURCE: spreadsheet.doc.source_id.upper(),
+            _PLACEHOLDER_TOPIC: spreadsheet.topic_label
+        }
+        properties = _get_properties(spreadsheet.t)
+
+        offset = 0
+        for op in self.ops:
+            if op[0] == _OP_CALL:
+                _, method, args = op
+                args = [_decode_arg(i, formats, placeholders) for i in args]
+                for idx in _ROW_ARGS.get(method, ()):
+                    args[idx] += offset
+                getattr(spreadsheet.ws, method)(*args)
+
+            elif op[0] == _OP_SHEET:
+                spreadsheet.ws = spreadsheet.wb.add_worksheet(op[1])
+                offset = 0
+
+            elif op[0] == _OP_VALUES:
+                _, specialization_id, row_from, row_to = op
+                spreadsheet.p = properties[specialization_id]
+                spreadsheet.p_values = spreadsheet.doc.get_values(specialization_id)
+                spreadsheet.ws_row = row_from + offset
+                write_property_value(spreadsheet)
+                offset = spreadsheet.ws_row - row_to
+
+
+def get_template(spreadsheet):
+    """Returns template of a spreadsheet - compiled once per specialization, generator & writer version.
+
+    :param Spreadsheet spreadsheet: Spreadsheet being generated.
+
+    :returns: Workbook template.
+    :rtype: Template
+
+    """
+    key = '{}_{}_{}_{}'.format(
+        spreadsheet.t.id, spreadsheet.t.change_history[-1][0], spreadsheet.VERSION, _SOURCE_HASH)
+    if key not in _TEMPLATES:
+        _TEMPLATES[key] = Template(_load(key) or _save(key, _compile(spreadsheet)))
+
+    return _TEMPLATES[key]
+
+
+def clear_cache():
+    """Deletes all compiled templates.
+
+    :returns: Number of deleted templates.
+    :rtype: int
+
+    """
+    _TEMPLATES.clear()
+
+    folder = io_mgr.get_cache_folder(_CACHE_NAME)
+    fnames = [i for i in os.listdir(folder) if i.endswith('.json')]
+    for fname in fnames:
+        os.remove(os.path.join(folder, fname))
+
+    return len(fnames)
+
+
+def _get_fpath(key):
+    """Returns path to a cached template.
+
+    """
+    return os.path.join(io_mgr.get_cache_folder(_CACHE_NAME), '{}.json'.format(key))
+
+
+def _load(key):
+    """Returns a template loaded from cache.
+
+    """
+    try:
+        with open(_get_fpath(key), 'r') as fstream:
+            return json.loads(fstream.read())
+    except (IOError, ValueError):
+        return None
+
+
+def _save(key, obj):
+    """Saves a template to cache - written atomically as workers may compile concurrently.
+
+    """
+    fpath = _get_fpath(key)
+    fpath_tmp = '{}.{}'.format(fpath, os.getpid())
+    with open(fpath_tmp, 'w') as fstream:
+        fstream.write(json.dumps(obj))
+    os.rename(fpath_tmp, fpath)
+
+    return obj
+
+
+def _get_properties(specialization):
+    """Returns properties of a topic specialization mapped by identifier.
+
+    """
+    return dict((p.id, p) for st in specialization.sub_topics
+                for ps in st.all_property_containers
+                for p in ps.properties)
+
+
+def _decode_arg(arg, formats, placeholders):
+    """Decodes an argument of a recorded worksheet call.
+
+    """
+    if isinstance(arg, dict) and '$format' in arg:
+        return formats[arg['$format']]
+    try:
+        return placeholders.get(arg, arg)
+    except TypeError:
+        return arg
+
+
+def _compile(spreadsheet):
+    """Compiles a template by recording the worksheet writers against a value free spreadsheet.
+
+    """
+    ctx = _Recorder(spreadsheet)
+    _set_identifiers(ctx.t)
+
+    write_frontis(ctx)
+    write_citations_and_parties(ctx)
+
+    for st in ctx.t.sub_topics:
+        ctx.st = st
+        ctx.ps = None
+        ctx.p = None
+        write_subtopic(ctx)
+
+        for ps in st.all_property_containers:
+            ctx.ps = ps
+            ctx.p = None
+            write_propertyset(ctx)
+
+            for p in ps.properties:
+                ctx.p = p
+                ctx.p_values = []
+                write_property(ctx)
+                ctx.write_values_slot()
+
+    write_choices(ctx)
+
+    obj = collections.OrderedDict()
+    obj['formats'] = ctx.formats
+    obj['ops'] = ctx.ops
+
+    return obj
+
+
+def _set_identifiers(specialization):
+    """Initialises property & property set identifiers.
+
+    """
+    idx1 = 0
+    for pc in specialization.all_property_containers:
+        level = len(pc.id.split('.'))
+        if level == 3:
+            idx1 += 1
+            idx2 = 1
+            idx3 = 1
+        elif level == 4:
+            idx2 += 1
+            idx3 = 1
+        elif level == 5:
+            idx3 += 1
+        pc.idx = '{}.{}.{}'.format(idx1, idx2, idx3)
+        for idx, p in enumerate(pc.properties):
+            p.idx = '{}.{}'.format(pc.idx, idx + 1)
+
+
+class _Recorder(object):
+    """Stands in for a spreadsheet, workbook & worksheet whilst a template is being compiled.
+
+    """
+    def __init__(self, spreadsheet):
+        """Instance initialiser.
+
+        """
+        self.choices = collections.OrderedDict()
+        self.doc = _Document(spreadsheet.CMIP6_MIP_ERA)
+        self.formats = []
+        self.ops = []
+        self.p = None
+        self.p_values = []
+        self.ps = None
+        self.st = None
+        self.t = spreadsheet.t
+        self.topic_label = _PLACEHOLDER_TOPIC
+        self.wb = self
+        self.ws = None
+        self.ws_row = 0
+        self.CMIP6_MIP_ERA = spreadsheet.CMIP6_MIP_ERA
+        self.VERSION = spreadsheet.VERSION
+        self._format_keys = dict()
+
+
+    def __getattr__(self, name):
+        """Records a worksheet call.
+
+        """
+        if name not in _ROW_ARGS and name not in ('hide', 'set_column'):
+            raise AttributeError(name)
+
+        def _record(*args):
+            self.ops.append([_OP_CALL, name, [i.encode() if isinstance(i, _Format) else i for i in args]])
+
+        return _record
+
+
+    def add_worksheet(self, title):
+        """Records addition of a worksheet.
+
+        """
+        self.ops.append([_OP_SHEET, title])
+        self.ws_row = 0
+
+        return self
+
+
+    def create_format(self, font_size=12, **properties):
+        """Returns a reference to a recorded cell format.
+
+        """
+        properties['font_size'] = font_size
+        key = tuple(sorted(properties.items()))
+        if key not in self._format_keys:
+            self._format_keys[key] = _Format(len(self.formats))
+            self.formats.append(properties)
+
+        return self._format_keys[key]
+
+
+    def write_values_slot(self):
+        """Records a slot into which property values are injected at replay time.
+
+        Value rows are written as for a property without values, so as to register enum choices
+        and determine rows spanned by the slot, and then discarded.
+
+        """
+        row_from = self.ws_row
+        op_count = len(self.ops)
+        write_property_value(self)
+        del self.ops[op_count:]
+        self.ops.append([_OP_VALUES, self.p.id, row_from, self.ws_row])
+
+
+class _Document(object):
+    """Value free topic output, identifiers are replaced by placeholders.
+
+    """
+    def __init__(self, mip_era):
+        """Instance initialiser.
+
+        """
+        self.institute = _PLACEHOLDER_INSTITUTE
+        self.mip_era = mip_era
+        self.source_id = _PLACEHOLDER_SOURCE
+
+
+class _Format(object):
+    """Reference to a recorded cell format.
+
+    """
+    def __init__(self, idx):
+        """Instance initialiser.
+
+        """
+        self.idx = idx
+
+
+    def encode(self):
+        """Returns JSON encodable reference.
+
+        """
+        return {'$format': self.idx}
@@ -0,0 +1,40 @@
+import xlsxwriter
+
+
+
+# Title of hidden worksheet holding enum choices.
+_WS_TITLE = 'choices'
+
+# First column of choices - columns A-D are parsed when generating JSON so must remain empty.
+_FIRST_COLUMN = 26
+
+
+def get_source(spreadsheet, choices):
+    """Returns data validation source of a set of enum choices, registering them if necessary.
+
+    """
+    key = tuple(choices)
+    if key not in spreadsheet.choices:
+        col = _FIRST_COLUMN + len(spreadsheet.choices)
+        spreadsheet.choices[key] = '={}!{}'.format(
+            _WS_TITLE, xlsxwriter.utility.xl_range_abs(0, col, len(key) - 1, col))
+
+    return spreadsheet.choices[key]
+
+
+def write(spreadsheet):
+    """Write hidden enum choices worksheet - one column per distinct set of choices.
+
+    """
+    if not spreadsheet.choices:
+        return
+
+    ws = spreadsheet.wb.add_worksheet(_WS_TITLE)
+    ws.hide()
+
+    # Written row by row as workbook is in constant memory mode.
+    columns = spreadsheet.choices.keys()
+    for ws_row in range(max(len(i) for i in columns)):
+        for idx, choices in enumerate(columns):
+            if ws_row < len(choices):
+                ws.write(ws_row, _FIRST_COLUMN + idx, choices[ws_row])
@@ -3,34 +3,20 @@ def write(spreadsheet):
 
     """
     # Set formats.
-    f0 = spreadsheet.create_format()
-    f0.set_bg_color('#FFFFFF')
+    f0 = spreadsheet.create_format(bg_color='#FFFFFF')
 
-    f1 = spreadsheet.create_format(24)
-    f1.set_bg_color('#003366')
-    f1.set_bold()
-    f1.set_font_color('#FFFFFF')
+    f1 = spreadsheet.create_format(24, bg_color='#003366', bold=True, font_color='#FFFFFF')
 
-    f2 = spreadsheet.create_format(14)
-    f2.set_bg_color('#337ab7')
-    f2.set_bold()
-    f2.set_font_color('#FFFFFF')
+    f2 = spreadsheet.create_format(14, bg_color='#337ab7', bold=True, font_color='#FFFFFF')
 
     f3 = spreadsheet.create_format(11)
 
-    f4 = spreadsheet.create_format()
-    f4.set_bold()
+    f4 = spreadsheet.create_format(bold=True)
 
-    f5 = spreadsheet.create_format(10)
-    f5.set_align('left')
-    f5.set_italic()
+    f5 = spreadsheet.create_format(10, align='left', italic=True)
 
-    f6 = spreadsheet.create_format(14)
-    f6.set_align('left')
-    f6.set_bg_color('#CCCCCC')
-    f6.set_font_color('#000000')
-    f6.set_text_wrap()
-    f6.set_align('top')
+    f6 = spreadsheet.create_format(14, align='left', bg_color='#CCCCCC', font_color='#000000',
+                                   text_wrap=True, valign='top')
 
     # Write worksheet.
     ws_title = 'Parties & Citations'
@@ -6,41 +6,19 @@ def write(spreadsheet):
     ws = spreadsheet.wb.add_worksheet('Frontis')
 
     # Set columns.
-    f0 = spreadsheet.create_format()
-    f0.set_bg_color('#337ab7')
-    f0.set_font_color('#FFFFFF')
+    f0 = spreadsheet.create_format(bg_color='#337ab7', font_color='#FFFFFF')
     ws.set_column('A:A', 35, f0)
     ws.set_column('B:B', 180, f0)
     ws.set_column('C:XFD', None, f0)
 
     # Set formats.
-    f0 = spreadsheet.create_format(26)
-    f0.set_bold()
-    f0.set_bg_color('#337ab7')
-    f0.set_font_color('#FFFFFF')
-
-    f1 = spreadsheet.create_format(16)
-    f1.set_bold()
-    f1.set_bg_color('#337ab7')
-    f1.set_font_color('#FFFFFF')
-
-    f2 = spreadsheet.create_format(16)
-    f2.set_bg_color('#337ab7')
-    f2.set_font_color('#FFFFFF')
-
-    f3 = spreadsheet.create_format(11)
-    f3.set_bg_color('#337ab7')
-    f3.set_font_color('#FFFFFF')
-    f3.set_italic()
-
-    f4 = spreadsheet.create_format(14)
-    f4.set_align('left')
-    f4.set_bg_color('#CCCCCC')
-    f4.set_font_color('#000000')
-
-    f5 = spreadsheet.create_format(14)
-    f5.set_bg_color('#337ab7')
-    f5.set_font_color('#FFFFFF')
+    f0 = spreadsheet.create_format(26, bold=True, bg_color='#337ab7', font_color='#FFFFFF')
+
+    f1 = spreadsheet.create_format(16, bold=True, bg_color='#337ab7', font_color='#FFFFFF')
+
+    f2 = spreadsheet.create_format(16, bg_color='#337ab7', font_color='#FFFFFF')
+
+    f5 = spreadsheet.create_format(14, bg_color='#337ab7', font_color='#FFFFFF')
 
     ws_row = 0
     ws.write(ws_row, 0, 'ES-DOC CMIP6 Model Documentation', f0)
@@ -3,19 +3,13 @@ def write(spreadsheet):
 
     """
     # Set formats.
-    f0 = spreadsheet.create_format(14)
-    f0.set_bg_color('#337ab7')
-    f0.set_bold()
-    f0.set_font_color('#FFFFFF')
+    f0 = spreadsheet.create_format(14, bg_color='#337ab7', bold=True, font_color='#FFFFFF')
 
     f1 = spreadsheet.create_format(11)
 
-    f2 = spreadsheet.create_format()
-    f2.set_bold()
+    f2 = spreadsheet.create_format(bold=True)
 
-    f3 = spreadsheet.create_format(10)
-    f3.set_align('left')
-    f3.set_italic()
+    f3 = spreadsheet.create_format(10, align='left', italic=True)
 
     # Write header.
     spreadsheet.ws_row += 2
@@ -1,5 +1,7 @@
 import collections
 
+from write_choices import get_source as get_choices_source
+
 
 def write(spreadsheet):
     """Writes a worksheet row per property value.
@@ -53,11 +55,13 @@ def write_property_value_enum(spreadsheet):
     p_values = [_str(i) for i in spreadsheet.p_values] or ['']
     spreadsheet.p_values = [choice_map[i] if i in choice_map else i for i in p_values]
 
-    # Inject values into spreadsheet.
+    # Inject values into spreadsheet - choices are held in a shared worksheet.
+    source = get_choices_source(spreadsheet, choice_map.values())
     for val in spreadsheet.p_values:
         write_property_values(spreadsheet, val, {
-            'validate': 'list'
-            }, choices=choice_map.values())
+            'validate': 'list',
+            'source': source
+            })
 
 
 def write_property_value_float(spreadsheet):
@@ -95,27 +99,16 @@ def write_property_value_str(spreadsheet):
             })
 
 
-def write_property_values(spreadsheet, val, validation_opts, choices=[]):
+def write_property_values(spreadsheet, val, validation_opts):
     """Writes property values to active worksheet.
 
     """
-    f0 = spreadsheet.create_format(14)
-    f0.set_align('left')
-    f0.set_bg_color('#CCCCCC')
-    f0.set_font_color('#000000')
-    f0.set_text_wrap()
-    f0.set_align('top')
+    f0 = spreadsheet.create_format(14, align='left', bg_color='#CCCCCC', font_color='#000000',
+                                   text_wrap=True, valign='top')
 
     spreadsheet.ws_row += 1
     spreadsheet.ws.set_row(spreadsheet.ws_row, 178 if spreadsheet.p.typeof == 'l-str' else 24)
     spreadsheet.ws.write(spreadsheet.ws_row, 1, val, f0)
-
-    if choices:
-        for idx, choice in enumerate(choices):
-            spreadsheet.ws.write(spreadsheet.ws_row, idx + 26, choice)
-        enum_source = 'AA{0}:A{1}{0}'.format(spreadsheet.ws_row + 1, chr(64 + len(choices)))
-        validation_opts['source'] = enum_source
-
     spreadsheet.ws.data_validation(spreadsheet.ws_row, 1, spreadsheet.ws_row, 1, validation_opts)
 
 
@@ -3,14 +3,9 @@ def write(spreadsheet):
 
     """
     # Set formats.
-    f0 = spreadsheet.create_format(18)
-    f0.set_bg_color('#003366')
-    f0.set_bold()
-    f0.set_font_color('#FFFFFF')
+    f0 = spreadsheet.create_format(18, bg_color='#003366', bold=True, font_color='#FFFFFF')
 
-    f1 = spreadsheet.create_format(14)
-    f1.set_bold()
-    f1.set_italic()
+    f1 = spreadsheet.create_format(14, bold=True, italic=True)
 
     # Write header.
     if len(spreadsheet.ps.id.split('.')) == 3:
@@ -3,8 +3,7 @@ def write(spreadsheet):
 
     """
     # Set formats.
-    f0 = spreadsheet.create_format()
-    f0.set_bg_color('#FFFFFF')
+    f0 = spreadsheet.create_format(bg_color='#FFFFFF')
 
     # Write worksheet.
     ws_title = '{}. {}'.format(spreadsheet.st.idx.split('.')[0], spreadsheet.st.names(2))[0:31]
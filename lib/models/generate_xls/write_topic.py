@@ -11,17 +11,22 @@ def write(ctx):
     """Write topic workbook.
 
     """
-    path = os.path.join(os.getenv('CMIP6_HOME'), 'repos/institutions')
-    path = os.path.join(path, ctx.institution_id)
-    path = os.path.join(path, ctx.CMIP6_MIP_ERA)
-    path = os.path.join(path, 'models')
-    path = os.path.join(path, ctx.source_id)
-    if not os.path.isdir(path):
-        os.makedirs(path)
-
-    fname = '_'.join([ctx.CMIP6_MIP_ERA, ctx.institution_id, ctx.source_id, ctx.topic_id])
-    fname += '.xlsx'
-    path = os.path.join(path, fname)
-
-    logger.log('generating --> {}'.format(fname), app='SH')
-    ctx.wb = xlsxwriter.Workbook(path)
+    if ctx.fpath is None:
+        path = os.path.join(os.getenv('CMIP6_HOME'), 'repos/institutions')
+        path = os.path.join(path, ctx.institution_id)
+        path = os.path.join(path, ctx.CMIP6_MIP_ERA)
+        path = os.path.join(path, 'models')
+        path = os.path.join(path, ctx.source_id)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        fname = '_'.join([ctx.CMIP6_MIP_ERA, ctx.institution_id, ctx.source_id, ctx.topic_id])
+        fname += '.xlsx'
+        ctx.fpath = os.path.join(path, fname)
+
+    logger.log('generating --> {}'.format(os.path.basename(ctx.fpath)), app='SH')
+
+    # Rows are flushed to disk as written, hence writers must write rows in order.
+    ctx.wb = xlsxwriter.Workbook(ctx.fpath, {
+        'constant_memory': True
+        })
@@ -0,0 +1,146 @@
+"""
+.. module:: latex_builder.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Compiles LaTeX documents within caller owned scratch folders.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+
+from latex.exc import LatexBuildError
+
+
+
+# Name of LaTeX file compiled within a scratch folder.
+_FNAME = 'document'
+
+# Interval (seconds) at which a LaTeX run is checked for completion.
+_POLL_INTERVAL = 0.1
+
+# Command line of pdflatex runs (invoked via latexmk).
+_PDFLATEX = [
+    'pdflatex',
+    '-interaction=batchmode',
+    '-halt-on-error',
+    '-no-shell-escape',
+    '-file-line-error',
+    '%O',
+    '%S'
+]
+
+
+def build_pdf(source, folder, timeout=None, fmt=None):
+    """Compiles LaTeX source to PDF - as per latex.build_pdf but with a scratch folder & timeout.
+
+    :param str source: LaTeX source.
+    :param str folder: Scratch folder within which compilation takes place.
+    :param int timeout: Number of seconds after which compilation is abandoned.
+    :param str fmt: Path to a precompiled format, in which case source excludes the preamble.
+
+    :returns: PDF content.
+    :rtype: str
+
+    """
+    fpath = os.path.join(folder, '{}.tex'.format(_FNAME))
+    with open(fpath, 'w') as fstream:
+        fstream.write(source)
+
+    pdflatex = list(_PDFLATEX)
+    env = None
+    if fmt is not None:
+        pdflatex.insert(1, '-fmt={}'.format(os.path.splitext(os.path.basename(fmt))[0]))
+        env = os.environ.copy()
+        env['TEXFORMATS'] = os.path.dirname(fmt) + os.pathsep
+
+    _run([
+        'latexmk',
+        '-pdf',
+        '-pdflatex={}'.format(' '.join(pdflatex)),
+        fpath
+        ], folder, timeout, env)
+
+    with open(os.path.join(folder, '{}.pdf'.format(_FNAME)), 'rb') as fstream:
+        return fstream.read()
+
+
+def build_format(preamble, fpath, timeout=None):
+    """Precompiles a LaTeX preamble into a format file.
+
+    :param str preamble: LaTeX preamble, i.e. document class & packages.
+    :param str fpath: Path to format file to be written.
+    :param int timeout: Number of seconds after which compilation is abandoned.
+
+    """
+    folder = tempfile.mkdtemp(prefix='cmip6-fmt-')
+    try:
+        with open(os.path.join(folder, '{}.tex'.format(_FNAME)), 'w') as fstream:
+            fstream.write(preamble)
+        _run([
+            'pdflatex',
+            '-ini',
+            '-jobname={}'.format(_FNAME),
+            '-interaction=batchmode',
+            '-halt-on-error',
+            '&pdflatex {}.tex\\dump'.format(_FNAME)
+            ], folder, timeout)
+
+        # Moved into place atomically as format may be in use by other processes.
+        fpath_tmp = '{}.{}'.format(fpath, os.getpid())
+        shutil.move(os.path.join(folder, '{}.fmt'.format(_FNAME)), fpath_tmp)
+        os.rename(fpath_tmp, fpath)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def get_engine_version():
+    """Returns version of pdflatex engine - format files are specific to an engine version.
+
+    """
+    return subprocess.check_output(['pdflatex', '--version']).split('\n')[0]
+
+
+def get_error(err):
+    """Returns a one line description of a compilation error.
+
+    :param Exception err: Error raised by build_pdf.
+
+    """
+    if isinstance(err, LatexBuildError):
+        errors = err.get_errors() if err.log else []
+        return errors[0]['error'] if errors else 'LaTeX build error'
+
+    return str(err).strip().split('\n')[0]
+
+
+def _run(args, folder, timeout, env=None):
+    """Runs a LaTeX command, killing it (and its child processes) upon timeout.
+
+    """
+    with open(os.devnull, 'r+') as devnull:
+        proc = subprocess.Popen(
+            args,
+            cwd=folder,
+            env=env,
+            stdin=devnull,
+            stdout=devnull,
+            stderr=devnull,
+            preexec_fn=os.setsid
+            )
+
+        started = time.time()
+        while proc.poll() is None:
+            if timeout and time.time() - started > timeout:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+                raise RuntimeError('timed out after {}s'.format(timeout))
+            time.sleep(_POLL_INTERVAL)
+
+    if proc.returncode != 0:
+        raise LatexBuildError(os.path.join(folder, '{}.log'.format(_FNAME)))
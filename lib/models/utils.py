@@ -9,6 +9,7 @@
 
 """
 import collections
+import copy
 import json
 import os
 
@@ -23,33 +24,155 @@ from lib.utils import io_mgr
 # Null property value.
 _NULL_PROPERTY = lambda: {'values': []}
 
+# Maximum number of parsed topic JSON documents held in memory.
+_DOCUMENT_CACHE_SIZE = 512
+
+
+class DocumentCache(object):
+    """Bounded LRU cache of parsed topic JSON documents keyed by (path, mtime, size).
+
+    Size is part of the key as a file may be rewritten within the file system's mtime resolution.
+
+    """
+    def __init__(self, size):
+        """Instance initialiser.
+
+        """
+        self.hits = 0
+        self.misses = 0
+        self.size = size
+        self._items = collections.OrderedDict()
+
+
+    def get(self, fpath):
+        """Returns parsed JSON document, or None if file does not exist.
+
+        """
+        try:
+            stat = os.stat(fpath)
+        except OSError:
+            return None
+
+        key = (fpath, stat.st_mtime, stat.st_size)
+
+        try:
+            obj = self._items.pop(key)
+        except KeyError:
+            self.misses += 1
+            with open(fpath, 'r') as fstream:
+                obj = json.loads(fstream.read())
+            if len(self._items) >= self.size:
+                self._items.popitem(last=False)
+        else:
+            self.hits += 1
+        self._items[key] = obj
+
+        return obj
+
+
+    def get_stats(self):
+        """Returns (process id, hits, misses) triple - counters are held per (worker) process.
+
+        """
+        return os.getpid(), self.hits, self.misses
+
+
+def get_document_cache_totals(stats):
+    """Returns (hits, misses) pair totalled across processes - counters being cumulative, a process's latest triple is used.
+
+    :param iterable stats: Set of DocumentCache.get_stats triples, in order of collection.
+
+    """
+    latest = dict((pid, (hits, misses)) for pid, hits, misses in stats)
+
+    return sum(i[0] for i in latest.values()), sum(i[1] for i in latest.values())
+
+
+# Enum choice values keyed by enum id.
+_ENUM_MEMBERS = dict()
+
+# Parsed topic JSON documents shared by all wrappers within a process.
+DOCUMENT_CACHE = DocumentCache(_DOCUMENT_CACHE_SIZE)
+
+
+class _JsonAttribute(object):
+    """Wrapper attribute whose value is loaded from the topic JSON file upon first access.
+
+    """
+    def __init__(self, name):
+        """Instance initialiser.
+
+        """
+        self.name = '_{}'.format(name)
+
+
+    def __get__(self, instance, owner):
+        """Returns attribute value.
+
+        """
+        if instance is None:
+            return self
+        instance._load()
+
+        return getattr(instance, self.name)
+
+
+    def __set__(self, instance, value):
+        """Sets attribute value.
+
+        """
+        instance._load()
+        setattr(instance, self.name, value)
+
 
 class ModelTopicOutput(object):
     """Model topic documentation output wrapper.
 
+    Topic JSON content and specialization are loaded lazily.  Parsed content is
+    shared via DOCUMENT_CACHE and is copied before being edited.
+
     """
+    citations = _JsonAttribute('citations')
+    content = _JsonAttribute('content')
+    institute = _JsonAttribute('institute')
+    mip_era = _JsonAttribute('mip_era')
+    parties = _JsonAttribute('parties')
+    seeding_source = _JsonAttribute('seeding_source')
+    source_id = _JsonAttribute('source_id')
+    topic = _JsonAttribute('topic')
+
     def __init__(self, mip_era, institute, source_id, topic):
         """Instance initialiser.
 
         """
         self.authors = []
-        self.citations = []
-        self.content = dict()
         self.fpath = io_mgr.get_model_topic_json(institute, source_id, topic)
-        self.institute = institute.canonical_name
-        self.mip_era = unicode(mip_era).strip().lower()
-        self.parties = []
-        self.seeding_source = None
-        self.source_id = source_id.canonical_name
-        self.specialization = get_topic_specialization(mip_era, topic.canonical_name)
-        self.topic = topic.canonical_name
+        self._citations = []
+        self._content = dict()
+        self._content_is_shared = False
+        self._institute = institute.canonical_name
+        self._is_loaded = False
+        self._mip_era = unicode(mip_era).strip().lower()
+        self._parties = []
         self._prop = None
+        self._prop_index = None
         self._prop_specialization = None
+        self._seeding_source = None
+        self._source_id = source_id.canonical_name
+        self._specialization = None
+        self._specialization_key = (mip_era, topic.canonical_name)
+        self._topic = topic.canonical_name
 
-        # Auto initialise from JSON output file.
-        if os.path.isfile(self.fpath):
-            obj = io_mgr.load_model_topic_json(institute, source_id, topic)
-            self._from_dict(obj)
+
+    @property
+    def specialization(self):
+        """Gets topic specialization.
+
+        """
+        if self._specialization is None:
+            self._specialization = get_topic_specialization(*self._specialization_key)
+
+        return self._specialization
 
 
     @classmethod
@@ -76,12 +199,26 @@ class ModelTopicOutput(object):
             fstream.write(json.dumps(self._to_dict(), indent=4))
 
 
+    def _load(self):
+        """Initialises internal state from JSON output file (if any).
+
+        """
+        if self._is_loaded:
+            return
+        self._is_loaded = True
+
+        obj = DOCUMENT_CACHE.get(self.fpath)
+        if obj is not None:
+            self._from_dict(obj)
+
+
     def _from_dict(self, obj):
         """Initialises internal state from a dictionary.
 
         """
         self.citations = obj.get('citations', [])
         self.content = obj['content']
+        self._content_is_shared = True
         self.institute = obj['institute']
         self.mip_era = obj['mipEra']
         self.parties = obj.get('parties', [])
@@ -115,8 +252,14 @@ class ModelTopicOutput(object):
         """Sets id of specialized property being edited.
 
         """
+        # Cached content is shared, therefore copy before editing.
+        if self._content_is_shared:
+            self.content = copy.deepcopy(self.content)
+        self._content_is_shared = False
+
         self.content[prop_id] = self.content.get(prop_id, _NULL_PROPERTY())
         self._prop = self.content[prop_id]
+        self._prop_index = set(self._prop['values'])
         self._prop_specialization = get_property_specialization(prop_id)
 
 
@@ -126,21 +269,36 @@ class ModelTopicOutput(object):
         :param obj val: Value to be assigned.
 
         """
+        self.set_values([val])
+
+
+    def set_values(self, vals):
+        """Sets a batch of values - either all values are assigned or none.
+
+        :param iterable vals: Values to be assigned.
+
+        """
+        vals = list(vals)
+
         # Validate input:
         # ... error if trying to add > 1 value to a property with singular cardinality.
         if not self._prop_specialization.is_collection and \
-           len(self._prop['values']) >= 1:
+           len(self._prop['values']) + len(vals) > 1:
             raise ValueError('Invalid property: only one value can be added')
 
         # ... error if adding a duplicate value.
-        if val in self._prop['values']:
-            raise ValueError('Invalid property: cannot add duplicate values')
+        batch = set()
+        for val in vals:
+            if val in self._prop_index or val in batch:
+                raise ValueError('Invalid property: cannot add duplicate values')
+            batch.add(val)
 
         # ... error if specialization complains.
-        self._prop_specialization.validate_value(val)
+        _validate_values(self._prop_specialization, vals)
 
         # Update state.
-        self._prop['values'].append(val)
+        self._prop['values'].extend(vals)
+        self._prop_index.update(batch)
 
 
     def sort_values(self):
@@ -174,3 +332,27 @@ class ModelTopicOutput(object):
 
         return values[0] if values else None
 
+
+def _validate_values(specialization, vals):
+    """Validates a batch of values against a property specialization.
+
+    Enum membership is tested against a set built once per enum, pyesdoc validation being
+    applied only to values that are not enum members.
+
+    """
+    members = _get_enum_members(specialization.enum) if specialization.enum else ()
+    for val in vals:
+        if val not in members:
+            specialization.validate_value(val)
+
+
+def _get_enum_members(enum):
+    """Returns set of enum choice values.
+
+    """
+    try:
+        return _ENUM_MEMBERS[enum.id]
+    except KeyError:
+        _ENUM_MEMBERS[enum.id] = frozenset(i.value for i in enum.choices)
+
+    return _ENUM_MEMBERS[enum.id]
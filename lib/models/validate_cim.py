@@ -0,0 +1,190 @@
+"""
+.. module:: validate_cim.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Validates CMIP6 model CIM documents.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+import argparse
+import collections
+import hashlib
+import json
+import os
+
+import pyesdoc
+
+from lib.utils import io_mgr
+from lib.utils import vocabs
+from lib.utils import workers
+
+
+
+# Define command line argument parser.
+_ARGS = argparse.ArgumentParser("Validates CMIP6 model CIM files.")
+_ARGS.add_argument(
+    "--institution-id",
+    help="An institution identifier",
+    dest="institution_id",
+    type=str
+    )
+_ARGS.add_argument(
+    "--workers",
+    help="Number of worker processes over which documents are distributed",
+    dest="workers",
+    type=int,
+    default=1
+    )
+
+# Name of cache folder in which validation results are stored.
+_CACHE_NAME = 'cim_validation'
+
+# Document meta fields excluded from content hash as they are reset each time a document is created.
+_VOLATILE_META_FIELDS = ('id', 'createDate', 'updateDate')
+
+# Suffix of validation errors that are ignored.
+_IGNORED_ERROR_SUFFIX = 'values --> is an empty list'
+
+
+def _main(args):
+    """Main entry point.
+
+    """
+    jobs = [(i, s) for i, s in vocabs.yield_sources(args.institution_id)
+            if os.path.isfile(io_mgr.get_model_cim(i, s))]
+
+    reports = []
+    results = workers.yield_results(_get_job_errors, [
+        (i.canonical_name, s.canonical_name) for i, s in jobs
+        ], args.workers)
+    for job_idx, errors in enumerate(results):
+        i, s = jobs[job_idx]
+        write_report(i, s, errors)
+        if errors:
+            reports.append((i.canonical_name, s.canonical_name, errors))
+
+    log_reports(reports)
+    prune_cache()
+
+
+def _get_job_errors(job):
+    """Returns validation errors of the CIM file associated with an (institute, source) job.
+
+    """
+    i = vocabs.get_institute(job[0])
+    s = vocabs.get_source(i, job[1])
+    with open(io_mgr.get_model_cim(i, s), 'r') as fstream:
+        content = fstream.read()
+
+    return get_errors(i, s, content)
+
+
+def get_errors(i, s, content, doc=None):
+    """Returns validation errors of a source's encoded CIM document.
+
+    Results are cached per source and reused whilst the document's content hash is unchanged.
+
+    :param pyessv.Term i: Institute.
+    :param pyessv.Term s: Model source.
+    :param str content: JSON encoded CIM document.
+    :param object doc: Decoded CIM document (decoded from content if not passed).
+
+    :returns: List of validation errors.
+    :rtype: list
+
+    """
+    fpath = _get_cache_fpath(i.canonical_name, s.canonical_name)
+    content_hash = _get_hash(content)
+    try:
+        with open(fpath, 'r') as fstream:
+            cached = json.loads(fstream.read())
+        if cached['hash'] == content_hash:
+            return cached['errors']
+    except (IOError, ValueError, KeyError, TypeError):
+        pass
+
+    if doc is None:
+        doc = pyesdoc.decode(content, 'json')
+    errors = [e for e in pyesdoc.validate(doc) if not e.endswith(_IGNORED_ERROR_SUFFIX)]
+
+    # Written atomically as workers may validate concurrently.
+    fpath_tmp = '{}.{}'.format(fpath, os.getpid())
+    with open(fpath_tmp, 'w') as fstream:
+        fstream.write(json.dumps({
+            'hash': content_hash,
+            'errors': errors
+        }))
+    os.rename(fpath_tmp, fpath)
+
+    return errors
+
+
+def prune_cache():
+    """Deletes cached validation results of sources no longer declared within the vocabularies.
+
+    """
+    fnames = set(os.path.basename(_get_cache_fpath(i.canonical_name, s.canonical_name))
+                 for i, s in vocabs.yield_sources(None))
+    folder = io_mgr.get_cache_folder(_CACHE_NAME)
+    for fname in os.listdir(folder):
+        if fname.endswith('.json') and fname not in fnames:
+            os.remove(os.path.join(folder, fname))
+
+
+def _get_cache_fpath(institution_id, source_id):
+    """Returns path to cached validation result of a source.
+
+    """
+    fname = '{}_{}.json'.format(institution_id, source_id)
+
+    return os.path.join(io_mgr.get_cache_folder(_CACHE_NAME), fname)
+
+
+def _get_hash(content):
+    """Returns hash of an encoded document, qualified by pyesdoc version as validation rules may change.
+
+    Volatile meta fields, i.e. identifier & dates assigned upon document creation, are excluded.
+
+    """
+    obj = json.loads(content)
+    meta = obj.get('meta') or dict()
+    for field in _VOLATILE_META_FIELDS:
+        meta.pop(field, None)
+    content = json.dumps(obj, sort_keys=True)
+
+    return hashlib.md5('{}:{}'.format(pyesdoc.__version__, content)).hexdigest()
+
+
+def write_report(i, s, errors):
+    """Writes a machine readable validation report.
+
+    :param pyessv.Term i: Institute.
+    :param pyessv.Term s: Model source.
+    :param list errors: Validation errors.
+
+    """
+    obj = collections.OrderedDict()
+    obj['institute'] = i.canonical_name
+    obj['sourceID'] = s.canonical_name
+    obj['isValid'] = len(errors) == 0
+    obj['errors'] = errors
+
+    io_mgr.write_model_cim_validation_report(i, s, obj)
+
+
+def log_reports(reports):
+    """Logs validation errors sorted by institute & source.
+
+    :param list reports: Set of (institute id, source id, errors) tuples.
+
+    """
+    for institution_id, source_id, errors in sorted(reports):
+        print("INVALID CIM DOCUMENT: {} :: {}".format(institution_id, source_id))
+        for err in errors:
+            print(err)
+
+
+# Main entry point.
+if __name__ == '__main__':
+    _main(_ARGS.parse_args())
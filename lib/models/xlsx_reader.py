@@ -0,0 +1,213 @@
+"""
+.. module:: xlsx_reader.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Streaming reader of CMIP6 model topic spreadsheets.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+"""
+try:
+    from xml.etree import cElementTree as ET
+except ImportError:
+    from xml.etree import ElementTree as ET
+
+from lib.utils import xlsx
+
+
+
+# Number of leading worksheets (frontis, parties & citations) not holding specialization values.
+_HEADER_SHEET_COUNT = 2
+
+# Number of leading columns (A-D) holding specialization data.
+_COLUMN_COUNT = 4
+
+# Values that are not to be emitted.
+_VALUE_BLOCKLIST = ('-', 'Other: -')
+
+# Value of open enum choice that requires documenting in the cell to the right.
+_VALUE_OPEN_ENUM_OTHER = 'Other: document in cell to the right'
+
+
+def yield_content(fpath):
+    """Yields (specialization id, values) blocks from a model topic spreadsheet.
+
+    Output is identical to that obtained by parsing the spreadsheet with openpyxl in read-only mode,
+    with the exception of date cells (returned as raw values) and shared formulae bearing
+    cell references (returned untranslated), neither of which are valid topic values.
+
+    :param str fpath: Path to a model topic spreadsheet.
+
+    """
+    with xlsx.Workbook(fpath) as workbook:
+        shared_strings = workbook.get_shared_strings(_get_shared_string)
+        for _, ws_path in workbook.sheets[_HEADER_SHEET_COUNT:]:
+            with workbook.open(ws_path) as fstream:
+                for block in _yield_blocks(_yield_rows(fstream, shared_strings)):
+                    yield block
+
+
+def _get_shared_string(element):
+    """Returns text content of a shared string element.
+
+    """
+    return xlsx.get_text(element).replace('x005F_', '')
+
+
+def _yield_rows(fstream, shared_strings):
+    """Yields worksheet rows as tuples of column A-D values.
+
+    Missing rows are yielded as empty tuples of values, declared rows without cells are skipped.
+
+    """
+    empty_row = (None, ) * _COLUMN_COUNT
+    shared_formulae = dict()
+    max_row = None
+    counter = 1
+    idx = 0
+    for _, element in ET.iterparse(fstream):
+        if element.tag == xlsx.TAG_ROW:
+            idx = int(element.get('r')) if element.get('r') else idx + 1
+            if max_row is not None and idx > max_row:
+                break
+
+            # Missing rows.
+            while counter < idx:
+                counter += 1
+                yield empty_row
+
+            # Declared row.
+            if counter <= idx:
+                counter += 1
+                cells = element.findall(xlsx.TAG_CELL)
+                if cells:
+                    yield _get_row(cells, shared_strings, shared_formulae)
+            element.clear()
+
+        elif element.tag == xlsx.TAG_DIMENSION:
+            max_row = _get_max_row(element.get('ref'))
+
+    if max_row is not None and max_row > idx:
+        while counter <= max_row:
+            counter += 1
+            yield empty_row
+
+
+def _get_max_row(ref):
+    """Returns last row declared within a worksheet dimension reference, e.g. A1:D42.
+
+    """
+    digits = ''.join(i for i in (ref or '').split(':')[-1] if i.isdigit())
+
+    return int(digits) if digits else None
+
+
+def _get_row(cells, shared_strings, shared_formulae):
+    """Returns column A-D values of a worksheet row.
+
+    """
+    row = [None] * _COLUMN_COUNT
+    for position, cell in enumerate(cells):
+        column = _get_column(cell.get('r'), position)
+        if column < _COLUMN_COUNT:
+            row[column] = _get_value(cell, shared_strings, shared_formulae)
+
+    return tuple(row)
+
+
+def _get_column(cell_name, position):
+    """Returns zero based column index of a cell, defaulting to its position within its row.
+
+    """
+    return xlsx.get_column(cell_name) if cell_name else position
+
+
+def _get_value(cell, shared_strings, shared_formulae):
+    """Returns decoded value of a worksheet cell.
+
+    """
+    data_type = cell.get('t', 'n')
+
+    # Formulae are returned as text, e.g. =TRUE().
+    formula = cell.find(xlsx.TAG_FORMULA)
+    if formula is not None:
+        value = '=' + (formula.text or '')
+        if formula.get('t') == 'shared':
+            idx = formula.get('si')
+            if idx in shared_formulae:
+                value = shared_formulae[idx]
+            elif value != '=':
+                shared_formulae[idx] = value
+        return value
+
+    if data_type == 'inlineStr':
+        child = cell.find(xlsx.TAG_INLINE_STRING)
+        return None if child is None else xlsx.get_text(child)
+
+    value = cell.findtext(xlsx.TAG_VALUE) or None
+    if value is None:
+        return None
+    elif data_type == 'n':
+        return float(value) if ('.' in value or 'E' in value or 'e' in value) else int(value)
+    elif data_type == 's':
+        return shared_strings[int(value)]
+    elif data_type == 'b':
+        return bool(int(value))
+
+    return value
+
+
+def _yield_blocks(rows):
+    """Yields (specialization id, values) blocks from a sequence of worksheet rows.
+
+    """
+    content = None
+    content_is_enum = None
+    for row in rows:
+        # Separation row - begin new specialization block.
+        if row[1] is None:
+            if content is not None:
+                if content[1]:
+                    yield content
+                content = None
+
+        # Specialization begin row - spec. id is hidden in 3rd column.
+        elif row[2] is not None:
+            content = (row[2], [])
+            content_is_enum = row[0] == 'ENUM'
+
+        # Specialization value row.
+        elif content is not None and not _is_note(row[1]):
+            value = row[1]
+
+            # Open enums are treated differently.
+            if content_is_enum:
+                if row[3]:
+                    value = 'Other: ' + row[3]
+                elif value == _VALUE_OPEN_ENUM_OTHER:
+                    break
+
+            # This can occur when spreadsheet is deformatted.
+            if value == '=TRUE()':
+                value = True
+            elif value == '=FALSE()':
+                value = False
+
+            # If value is not in blocklist then emit.
+            if value not in _VALUE_BLOCKLIST:
+                content[1].append(value)
+
+    # Apply last specialization block.
+    if content is not None:
+        if content[1]:
+            yield content
+
+
+def _is_note(value):
+    """Returns flag indicating whether a cell value represents a note to the user or not.
+
+    """
+    try:
+        return value.startswith('NOTE: ')
+    except AttributeError:
+        return False
@@ -44,6 +44,18 @@ def get_folder(parts):
     return path
 
 
+def get_cache_folder(name):
+    """Returns path to a local cache directory.
+
+    """
+    path = os.path.join(CMIP6_HOME, 'cache')
+    path = os.path.join(path, name)
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    return path
+
+
 def get_citations_folder(i):
     """Returns path to an institute's citations directory.
 
@@ -141,6 +153,19 @@ def get_model_cim(institution, source_id):
     return os.path.join(folder, fname)
 
 
+def get_model_cim_validation_report(institution, source_id):
+    """Returns path to cim validation report for a particular model.
+
+    """
+    folder = get_model_folder(institution, source_id, 'validation')
+    fname = 'cmip6_{}_{}.json'.format(
+        institution.canonical_name,
+        source_id.canonical_name
+        )
+
+    return os.path.join(folder, fname)
+
+
 def get_model_settings(institution, fname):
     """Returns path to a model settings file.
 
@@ -164,6 +189,33 @@ def get_model_topic_json(institution, source_id, topic):
     return os.path.join(folder, fname)
 
 
+def get_model_pdf_index(institution, source_id):
+    """Returns path to index of LaTeX source hashes of a model's pdf files.
+
+    """
+    folder = get_model_folder(institution, source_id, 'pdf')
+    fname = 'cmip6_{}_{}_index.json'.format(
+        institution.canonical_name,
+        source_id.canonical_name
+        )
+
+    return os.path.join(folder, fname)
+
+
+def get_model_topic_html(institution, source_id, topic):
+    """Returns path to html preview file for a particular model topic.
+
+    """
+    folder = get_model_folder(institution, source_id, 'html')
+    fname = 'cmip6_{}_{}_{}.html'.format(
+        institution.canonical_name,
+        source_id.canonical_name,
+        topic.canonical_name
+        )
+
+    return os.path.join(folder, fname)
+
+
 def get_model_topic_pdf(institution, source_id, topic):
     """Returns path to pdf file for a particular model topic.
 
@@ -237,6 +289,15 @@ def load_model_settings(i, fname):
     return _load_json_content(path)
 
 
+def load_model_pdf_index(i, s):
+    """Returns index of LaTeX source hashes of a model's pdf files.
+
+    """
+    path = get_model_pdf_index(i, s)
+
+    return _load_json_content(path)
+
+
 def load_model_topic_json(i, s, t):
     """Returns model topic JSON content.
 
@@ -256,6 +317,33 @@ def write_model_cim(i, s, content):
         fstream.write(content)
 
 
+def write_model_cim_validation_report(i, s, content):
+    """Writes a model cim validation report to file system.
+
+    """
+    fpath = get_model_cim_validation_report(i, s)
+    with open(fpath, 'w') as fstream:
+        fstream.write(json.dumps(content, indent=4))
+
+
+def write_model_pdf_index(i, s, content):
+    """Writes index of LaTeX source hashes of a model's pdf files to file system.
+
+    """
+    fpath = get_model_pdf_index(i, s)
+    with open(fpath, 'w') as fstream:
+        fstream.write(json.dumps(content, indent=4))
+
+
+def write_model_settings(i, fname, content):
+    """Writes a model settings file to file system.
+
+    """
+    fpath = get_model_settings(i, fname)
+    with open(fpath, 'w') as fstream:
+        fstream.write(json.dumps(content, indent=4))
+
+
 def write_model_topic_json(i, s, t, content):
     """Writes a model topic JSON file to file system.
 
@@ -265,6 +353,15 @@ def write_model_topic_json(i, s, t, content):
         fstream.write(json.dumps(content, indent=4))
 
 
+def write_model_topic_html(i, s, t, content):
+    """Writes a model topic HTML preview file to file system.
+
+    """
+    fpath = get_model_topic_html(i, s, t)
+    with open(fpath, 'w') as fstream:
+        fstream.write(content)
+
+
 def write_model_topic_pdf(i, s, t, content):
     """Writes a model topic PDF file to file system.
 
@@ -0,0 +1,41 @@
+"""
+.. module:: workers.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Process pool utility functions.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+
+"""
+import multiprocessing
+
+
+
+def yield_results(func, jobs, workers=1, initializer=None):
+    """Yields results of applying a function to a set of jobs, in job order.
+
+    When more than one worker is requested jobs are distributed across a process pool.
+    As workers are forked, state loaded by the parent process (e.g. pyessv, specializations)
+    is inherited by - and remains warm within - each worker.
+
+    :param function func: Function to be applied to each job - must be importable by name.
+    :param list jobs: Set of picklable jobs.
+    :param int workers: Number of worker processes.
+    :param function initializer: Function invoked when a worker process starts.
+
+    """
+    if workers <= 1:
+        if initializer is not None:
+            initializer()
+        for job in jobs:
+            yield func(job)
+        return
+
+    pool = multiprocessing.Pool(processes=workers, initializer=initializer)
+    try:
+        for result in pool.imap(func, jobs):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,190 @@
+"""
+.. module:: xlsx.py
+   :license: GPL/CeCIL
+   :platform: Unix, Windows
+   :synopsis: Low level access to the parts of xlsx (OOXML) workbooks.
+
+.. moduleauthor:: Mark Conway-Greenslade <momipsl@ipsl.jussieu.fr>
+
+
+"""
+import posixpath
+import zipfile
+
+try:
+    from xml.etree import cElementTree as ET
+except ImportError:
+    from xml.etree import ElementTree as ET
+
+
+
+# OOXML namespaces.
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_PKG_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+NS_DOC_RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_XML = 'http://www.w3.org/XML/1998/namespace'
+
+# OOXML tags.
+TAG_CELL = '{%s}c' % NS_MAIN
+TAG_DIMENSION = '{%s}dimension' % NS_MAIN
+TAG_FORMULA = '{%s}f' % NS_MAIN
+TAG_INLINE_STRING = '{%s}is' % NS_MAIN
+TAG_RELATIONSHIP = '{%s}Relationship' % NS_PKG_RELS
+TAG_RICH_TEXT_RUN = '{%s}r' % NS_MAIN
+TAG_ROW = '{%s}row' % NS_MAIN
+TAG_SHARED_STRING = '{%s}si' % NS_MAIN
+TAG_SHEET = '{%s}sheet' % NS_MAIN
+TAG_TEXT = '{%s}t' % NS_MAIN
+TAG_VALUE = '{%s}v' % NS_MAIN
+
+# OOXML attributes.
+ATTR_RELATIONSHIP_ID = '{%s}id' % NS_DOC_RELS
+ATTR_SPACE = '{%s}space' % NS_XML
+
+
+class Workbook(object):
+    """Parts of an xlsx workbook - part names are case insensitive.
+
+    """
+    def __init__(self, fpath):
+        """Instance constructor.
+
+        :param str fpath: Path to an xlsx workbook.
+
+        """
+        self.archive = zipfile.ZipFile(fpath)
+        self._members = dict((i.replace('\\', '/').lower(), i) for i in self.archive.namelist())
+        self.sheets, self.shared_strings_path = self._get_parts()
+
+
+    def __enter__(self):
+        """Context manager entry.
+
+        """
+        return self
+
+
+    def __exit__(self, *args):
+        """Context manager exit.
+
+        """
+        self.close()
+
+
+    def close(self):
+        """Closes underlying archive.
+
+        """
+        self.archive.close()
+
+
+    def open(self, path):
+        """Returns a file like object for streaming an archive member.
+
+        """
+        return self.archive.open(self._members[path.lower()])
+
+
+    def read(self, path):
+        """Returns content of an archive member.
+
+        """
+        return self.archive.read(self._members[path.lower()])
+
+
+    def get_shared_strings(self, get_text):
+        """Returns shared strings table.
+
+        :param function get_text: Decodes a shared string element.
+
+        """
+        result = []
+        if self.shared_strings_path is None:
+            return result
+
+        with self.open(self.shared_strings_path) as fstream:
+            for _, element in ET.iterparse(fstream):
+                if element.tag == TAG_SHARED_STRING:
+                    result.append(get_text(element))
+                    element.clear()
+
+        return result
+
+
+    def _get_parts(self):
+        """Returns (name, path) pairs of worksheet parts, plus path of shared strings part.
+
+        """
+        wb_path = None
+        for rel_type, target, _ in self._yield_rels('_rels/.rels', ''):
+            if rel_type.endswith('/officeDocument'):
+                wb_path = target
+                break
+        if wb_path is None:
+            raise IOError('Invalid xlsx file: workbook part not found')
+
+        wb_folder = posixpath.dirname(wb_path)
+        wb_rels_path = posixpath.join(wb_folder, '_rels', '{}.rels'.format(posixpath.basename(wb_path)))
+        wb_rels = dict()
+        ss_path = None
+        for rel_type, target, rel_id in self._yield_rels(wb_rels_path, wb_folder):
+            wb_rels[rel_id] = (rel_type, target)
+            if rel_type.endswith('/sharedStrings'):
+                ss_path = target
+
+        # Worksheets are returned in workbook order, chartsheets & missing parts are ignored.
+        sheets = []
+        for sheet in ET.fromstring(self.read(wb_path)).iter(TAG_SHEET):
+            try:
+                rel_type, target = wb_rels[sheet.get(ATTR_RELATIONSHIP_ID)]
+            except KeyError:
+                continue
+            if rel_type.endswith('/worksheet') and target.lower() in self._members:
+                sheets.append((sheet.get('name'), target))
+
+        return sheets, ss_path
+
+
+    def _yield_rels(self, rels_path, folder):
+        """Yields (type, target, id) relationships declared within a relationships part.
+
+        """
+        for rel in ET.fromstring(self.read(rels_path)).iter(TAG_RELATIONSHIP):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            yield rel.get('Type'), target, rel.get('Id')
+
+
+def get_text(element, get_fragment=lambda i: i.text):
+    """Returns text content of a (possibly rich) string element - phonetic runs are ignored.
+
+    :param element: A shared string (si) or inline string (is) element.
+    :param function get_fragment: Decodes a text (t) element.
+
+    """
+    fragments = []
+    for child in element:
+        if child.tag == TAG_TEXT:
+            fragments.append(get_fragment(child))
+        elif child.tag == TAG_RICH_TEXT_RUN:
+            fragments += [get_fragment(i) for i in child if i.tag == TAG_TEXT]
+
+    return u''.join(i for i in fragments if i)
+
+
+def get_column(cell_name):
+    """Returns zero based column index of a cell name, e.g. C12 -> 2, $C$12 -> 2.
+
+    """
+    column = 0
+    for char in cell_name:
+        if char == '$':
+            continue
+        if not char.isalpha():
+            break
+        column = column * 26 + (ord(char.upper()) - 64)
+
+    return column - 1
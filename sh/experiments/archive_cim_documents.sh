@@ -9,7 +9,6 @@ function _main()
 	SOURCE_DIR="$CMIP6_HOME"/repos/libs/esdoc-docs/cmip6/experiments/cim-documents
 	TARGET_DIR="$CMIP6_HOME"/repos/archives/esdoc-archive/esdoc/cmip6/spreadsheet-experiments
 
-	rm -rf "$TARGET_DIR"
 	mkdir -p "$TARGET_DIR"
 
 	pushd "$CMIP6_HOME" || exit
@@ -6,18 +6,27 @@ function _main()
 	local DIR_IO
 	local PATH_TO_SPREADSHEET
 	local PATH_TO_IDENTIFIERS
+	local DIR_SNAPSHOT
+	local WORKERS
 
 	DIR_IO="$CMIP6_HOME"/repos/libs/esdoc-docs/cmip6/experiments/cim-documents
 	PATH_TO_SPREADSHEET="$CMIP6_HOME"/repos/libs/esdoc-docs/cmip6/experiments/spreadsheet/experiments.xlsx
 	PATH_TO_IDENTIFIERS="$CMIP6_HOME"/repos/libs/esdoc-docs/cmip6/experiments/spreadsheet/document-identifiers.txt
+	DIR_SNAPSHOT="$CMIP6_HOME"/cache/experiments_workbook
 
-	rm -rf "$DIR_IO"
-	mkdir "$DIR_IO"
+	if [ "$1" ]; then
+		WORKERS=${1}
+	else
+		WORKERS=1
+	fi
+
+	# Existing documents are retained so that only changed documents are rewritten.
+	mkdir -p "$DIR_IO"
 
 	pushd "$CMIP6_HOME" || exit
-	pipenv run python "$CMIP6_HOME"/lib/experiments/write_cim_documents --io-dir="$DIR_IO" --spreadsheet="$PATH_TO_SPREADSHEET" --identifiers="$PATH_TO_IDENTIFIERS"
+	pipenv run python "$CMIP6_HOME"/lib/experiments/write_cim_documents --io-dir="$DIR_IO" --spreadsheet="$PATH_TO_SPREADSHEET" --identifiers="$PATH_TO_IDENTIFIERS" --snapshot-dir="$DIR_SNAPSHOT" --workers="$WORKERS"
 	popd || exit
 }
 
 # Invoke entry point.
-_main
+_main "$1"
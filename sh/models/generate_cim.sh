@@ -4,6 +4,8 @@
 function _main()
 {
 	local INSTITUTION
+	local WORKERS
+	local FORCE
 
 	if [ "$1" ]; then
 		INSTITUTION=${1}
@@ -11,10 +13,22 @@ function _main()
 		INSTITUTION="all"
 	fi
 
+	if [ "$2" ]; then
+		WORKERS=${2}
+	else
+		WORKERS=1
+	fi
+
+	if [ "$3" == "force" ]; then
+		FORCE="--force"
+	else
+		FORCE=""
+	fi
+
 	pushd "$CMIP6_HOME" || exit
-	pipenv run python "$CMIP6_HOME"/lib/models/generate_cim.py --institution-id="$INSTITUTION"
+	pipenv run python "$CMIP6_HOME"/lib/models/generate_cim.py --institution-id="$INSTITUTION" --workers="$WORKERS" $FORCE
 	popd || exit
 }
 
 # Invoke entry point.
-_main "$1"
\ No newline at end of file
+_main "$1" "$2" "$3"
\ No newline at end of file
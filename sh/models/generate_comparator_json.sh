@@ -4,11 +4,25 @@
 function _main()
 {
 	local DIR_OUTPUT=${1}
+	local SHARD_BY
+	local FULL
+
+	if [ "$2" ]; then
+		SHARD_BY="--shard-by=${2}"
+	else
+		SHARD_BY=""
+	fi
+
+	if [ "$3" == "full" ]; then
+		FULL="--full"
+	else
+		FULL=""
+	fi
 
 	pushd "$CMIP6_HOME" || exit
-	pipenv run python "$CMIP6_HOME"/lib/models/generate_comparator_json.py --destination "$DIR_OUTPUT"
+	pipenv run python "$CMIP6_HOME"/lib/models/generate_comparator_json.py --destination "$DIR_OUTPUT" $SHARD_BY $FULL
 	popd || exit
 }
 
 # Invoke entry point.
-_main "$1"
\ No newline at end of file
+_main "$1" "$2" "$3"
\ No newline at end of file
@@ -0,0 +1,27 @@
+#!/usr/bin/env bash
+
+# Main entry point.
+function _main()
+{
+	local INSTITUTION
+	local WORKERS
+
+	if [ "$1" ]; then
+		INSTITUTION=${1}
+	else
+		INSTITUTION="all"
+	fi
+
+	if [ "$2" ]; then
+		WORKERS=${2}
+	else
+		WORKERS=1
+	fi
+
+	pushd "$CMIP6_HOME" || exit
+	pipenv run python "$CMIP6_HOME"/lib/models/generate_pdf.py --institution-id="$INSTITUTION" --workers="$WORKERS" --renderer=html
+	popd || exit
+}
+
+# Invoke entry point.
+_main "$1" "$2"
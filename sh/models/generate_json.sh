@@ -4,6 +4,7 @@
 function _main()
 {
 	local INSTITUTION
+	local WORKERS
 
 	if [ "$1" ]; then
 		INSTITUTION=${1}
@@ -11,10 +12,16 @@ function _main()
 		INSTITUTION="all"
 	fi
 
+	if [ "$2" ]; then
+		WORKERS=${2}
+	else
+		WORKERS=1
+	fi
+
 	pushd "$CMIP6_HOME" || exit
-	pipenv run python "$CMIP6_HOME"/lib/models/generate_json.py --institution-id="$INSTITUTION"
+	pipenv run python "$CMIP6_HOME"/lib/models/generate_json.py --institution-id="$INSTITUTION" --workers="$WORKERS"
 	popd || exit
 }
 
 # Invoke entry point.
-_main "$1"
\ No newline at end of file
+_main "$1" "$2"
\ No newline at end of file
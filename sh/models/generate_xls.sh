@@ -4,6 +4,8 @@
 function _main()
 {
 	local INSTITUTION
+	local WORKERS
+	local CLEAR_TEMPLATES
 
 	if [ "$1" ]; then
 		INSTITUTION=${1}
@@ -11,10 +13,22 @@ function _main()
 		INSTITUTION="all"
 	fi
 
+	if [ "$2" ]; then
+		WORKERS=${2}
+	else
+		WORKERS=1
+	fi
+
+	if [ "$3" == "clear-templates" ]; then
+		CLEAR_TEMPLATES="--clear-templates"
+	else
+		CLEAR_TEMPLATES=""
+	fi
+
 	pushd "$CMIP6_HOME" || exit
-	pipenv run python "$CMIP6_HOME"/lib/models/generate_xls --institution-id="$INSTITUTION"
+	pipenv run python "$CMIP6_HOME"/lib/models/generate_xls --institution-id="$INSTITUTION" --workers="$WORKERS" $CLEAR_TEMPLATES
 	popd || exit
 }
 
 # Invoke entry point.
-_main "$1"
+_main "$1" "$2" "$3"